@@ -1,5 +1,6 @@
 import os,sys,numpy
-import sklearn,sklearn.decomposition,sklearn.manifold
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','..','library'))
+import fastaIndex,embeddings
 import matplotlib,matplotlib.pyplot
 
 matplotlib.rcParams.update({'font.size':18,'font.family':'Arial','xtick.labelsize':14,'ytick.labelsize':14})
@@ -45,6 +46,8 @@ if os.path.exists(quantDir) == False:
 if os.path.exists(resultsDir) == False:
     os.mkdir(resultsDir)
 
+embeddingCacheDir=resultsDir+'embeddings/'
+
 # 1. reading files
 print('reading files...')
 
@@ -54,20 +57,17 @@ files=[element for element in items if '.fastq' in element]
 
 # 1.2. reading gene IDs and gene names
 synonyms={}
-with open(transcriptomeFastaFile,'r') as f:
-    for line in f:
-        if line[0] == '>':
-
-            id=line.split('>')[1].split(' ')[0]
-            if 'locus_tag' in line:
-                name=line.split('[locus_tag=')[1].split(' ')[0].replace(']','')
-            #elif 'gene' in line:
-            #    name=line.split('[gene=')[1].split(' ')[0].replace(']','')
-            else:
-                print('error while parsing transcriptome fasta file...')
-                sys.exit()
+index,ids=fastaIndex.fastaIndexReader(transcriptomeFastaFile)
+for id in ids:
+    if 'locus_tag' in index[id]['attributes']:
+        name=index[id]['attributes']['locus_tag']
+    #elif 'gene' in index[id]['attributes']:
+    #    name=index[id]['attributes']['gene']
+    else:
+        print('error while parsing transcriptome fasta file...')
+        sys.exit()
 
-            synonyms[id]=name
+    synonyms[id]=name
 
 # 2. processing
 print('processing files...')
@@ -175,10 +175,8 @@ original=numpy.array(x)
 
 # 4.1. PCA of samples
 print('running PCA...')
-pcaMethod=sklearn.decomposition.PCA(n_components=5)
-pcaObject=pcaMethod.fit(original)
-new=pcaObject.transform(original)
-explainedVar=pcaObject.explained_variance_ratio_
+new,explainedVar=embeddings.pcaReducer(original,cacheDir=embeddingCacheDir)
+new=new[:,:5]; explainedVar=explainedVar[:5]
 print('cumsum explained variance...')
 print(numpy.cumsum(explainedVar))
 
@@ -194,9 +192,7 @@ print()
 
 # 4.2. t-SNE of samples
 print('running t-SNE...')
-tSNE_Method=sklearn.manifold.TSNE(method='exact',verbose=1,init='pca')
-tSNE_Object=tSNE_Method.fit(original)
-new=tSNE_Object.fit_transform(original)
+new=embeddings.tsneEmbedder(original,cacheDir=embeddingCacheDir)
 
 for i in range(len(new)):
     matplotlib.pyplot.scatter(new[i,0],new[i,1],c=theFaceColors[i],marker=theMarkers[i],s=60,edgecolors=theEdgeColors[i])
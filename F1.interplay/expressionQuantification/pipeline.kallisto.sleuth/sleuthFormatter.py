@@ -3,14 +3,18 @@
 ###
 
 import os,pandas,sys,numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','..','library'))
+import detCaller,expressionCache
 
 def formatter():
 
     '''
-    This function generates a new file with only those DETs that pass the rule of abs log2 FC > 1
+    This function generates a new file with only those DETs that pass the rule of abs log2 FC > 1.
+    It returns the DETs as a boolean mask over the genes of the expression matrix.
     '''
 
     label=sleuthResultsFile.replace('.csv','')
+    E,geneNames,sampleNames=expression
 
     # f.0. open comparisons files
     outputFile=sleuthResultsFile.replace('.csv','.filtered.txt')
@@ -19,73 +23,43 @@ def formatter():
     g.write('geneName\tmeanA\tmeanB\tlog2FC\tq-value\tq<0.05|abs(log2(FC))>1|maxExp>10.\n')
 
     formattedNum=[]; formattedDen=[]
-    for sampleName in expression:
-        if 'trna' in sampleName:
-            if 'tp.4' in sampleName:
-                formattedNum.append(sampleName)
-            if 'tp.2' in sampleName:
-                formattedDen.append(sampleName)
-
-    # f.1. retain the number of passed
-    passed={}   
-    with open(sleuthResultsFile,'r') as f:
-        next(f)
-        for line in f:
-            v=line.split(',')
-            locusID=v[1].replace('"','')
-            qValue=v[3]
-            geneName=synonyms[locusID]
-
-            # f.2. check for FC
-            a=[expression[sample][geneName] for sample in formattedNum]
-            b=[expression[sample][geneName] for sample in formattedDen]
-            meanA=numpy.mean(a)
-            meanB=numpy.mean(b)
-            FC=(meanA+1)/(meanB+1)
-            log2FC=numpy.log2(FC)
-
-            if abs(log2FC) > 1 and numpy.max([meanA,meanB]) > 10.:
-                flag=True
-                passed[geneName]=log2FC
-                g.write('{}\t{}\t{}\t{}\t{}\t{}\n'.format(geneName,meanA,meanB,log2FC,qValue,flag))
-            else:
-                flag=False
-                print(geneName,log2FC,meanA,meanB,qValue)
-
-            # f.3. write line in filtered file
-            g.write('{}\t{}\t{}\t{}\t{}\t{}\n'.format(geneName,meanA,meanB,log2FC,qValue,flag))
+    for i in range(len(sampleNames)):
+        if 'trna' in sampleNames[i]:
+            if 'tp.4' in sampleNames[i]:
+                formattedNum.append(i)
+            if 'tp.2' in sampleNames[i]:
+                formattedDen.append(i)
+
+    # f.1. join sleuth transcripts to the expression matrix
+    table=detCaller.sleuthReader(sleuthResultsFile)
+    geneIndex={geneNames[i]:i for i in range(len(geneNames))}
+    rows,found=detCaller.testedRows(table,synonyms,geneIndex)
+    rows=rows[found]; qValues=table['qval'][found]
+
+    # f.2. check for FC, for all transcripts at once
+    meanA=numpy.mean(E[:,formattedNum],axis=1)[rows]
+    meanB=numpy.mean(E[:,formattedDen],axis=1)[rows]
+    log2FC,up,down=detCaller.foldChangeFilter(meanA,meanB,pseudocount=1)
+    flags=up | down
+
+    # f.3. write lines in filtered file
+    for i in range(len(rows)):
+        geneName=geneNames[rows[i]]
+        if flags[i] == False:
+            print(geneName,log2FC[i],meanA[i],meanB[i],qValues[i])
+        g.write('{}\t{}\t{}\t{}\t{}\t{}\n'.format(geneName,meanA[i],meanB[i],log2FC[i],qValues[i],bool(flags[i])))
 
     # f.4. close filtred file
     g.close()
 
+    passed=numpy.zeros(len(geneNames),dtype=bool)
+    passed[rows[flags]]=True
+
     # f.5. last message
-    print('\t {} DETs passed filter for comparison {}.'.format(len(passed),label))
+    print('\t {} DETs passed filter for comparison {}.'.format(numpy.sum(passed),label))
 
     return passed
 
-def expressionReader():
-
-    '''
-    This function creates a dictionary with the expression from kallisto.
-    '''
-
-    expression={}
-    with open(expressionFile,'r') as f:
-        
-        h=f.readline()
-        headers=h.split()
-        for sample in headers:
-            expression[sample]={}
-
-        for line in f:
-            v=line.split('\t')
-            geneName=v[0]
-            for i in range(len(v[2:])):
-                value=float(v[i+1])
-                expression[headers[i]][geneName]=value
-
-    return expression
-
 def synonymsFinder():
 
     '''
@@ -120,7 +94,7 @@ print('reading data...')
 synonyms=synonymsFinder()
 
 # 1.4. define expression
-expression=expressionReader()
+expression=expressionCache.cachedMatrixReader(expressionFile)
 
 # 2. iterate over comparisons
 print('formatting info ...')
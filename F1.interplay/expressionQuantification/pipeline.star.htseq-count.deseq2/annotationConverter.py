@@ -1,4 +1,6 @@
 import os,sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','..','library'))
+import annotationDatabase
 
 # 0. user defined variables
 resultsFolder='/Volumes/omics4tb/alomana/projects/TLR/data/DESeq2/'
@@ -6,19 +8,12 @@ annotationFile='/Volumes/omics4tb/alomana/projects/TLR/data/genome/alo.build.NC0
 
 # 1. build a dictionary of new to old annotation
 lexicon={}
-with open(annotationFile,'r') as f:
-    next(f)
-    next(f)
-    next(f)
-    for line in f:
-        v=line.split('\t')
-        info=v[-1]
-        info=info.replace('\n','')
-        new=None; old=None
-        if 'old_locus_tag' in info:
-            new=info.split('ID=')[1].split(';')[0]
-            old=info.split('old_locus_tag=')[1].split('%')[0].split(';')[0]
-            lexicon[new]=old
+annotation=annotationDatabase.annotationReader(annotationFile)
+IDs=annotation['ID'].tolist()
+for row in range(len(IDs)):
+    olds=annotationDatabase.oldTagsFinder(annotation,row)
+    if len(olds) != 0:
+        lexicon[IDs[row]]=olds[0]
 
 # 2. locate input files
 allFiles=os.listdir(resultsFolder)
@@ -3,9 +3,37 @@
 ###
 
 import os,sys,numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','library'))
+import expressionCache,resamplingNull
 import matplotlib,matplotlib.pyplot
 matplotlib.rcParams.update({'font.size':24,'font.family':'Arial','xtick.labelsize':18,'ytick.labelsize':18})
 
+def distributionPlotter(population,nulls,labels,theColors,figureFile):
+
+    '''
+    This function makes a figure of the overall distribution with the null and the observed mean of each group in labels.
+    '''
+
+    x,y=histogrammer(population)
+    matplotlib.pyplot.plot(x,y,'-',color='black',lw=1)
+
+    for label in labels:
+        x,y=histogrammer(nulls[label]['null'])
+        matplotlib.pyplot.plot(x,y,linestyle=':',color=theColors[label],lw=2,alpha=0.5)
+        matplotlib.pyplot.axvline(x=nulls[label]['observed'],color=theColors[label],linestyle='-',lw=3)
+
+    matplotlib.pyplot.xlim([-0.1,4.])
+    matplotlib.pyplot.ylim([-0.01,0.6])
+
+    matplotlib.pyplot.xlabel('mRNA (log$_{10}$ TPM+1)')
+    matplotlib.pyplot.ylabel('Probability')
+
+    matplotlib.pyplot.tight_layout()
+    matplotlib.pyplot.savefig(figureFile)
+    matplotlib.pyplot.clf()
+
+    return None
+
 def histogrammer(theData):
 
     '''
@@ -37,43 +65,7 @@ def transcriptomicsReader():
     transcriptomics[trna/rbf][replicate][timepoint][gene]
     '''
 
-    data={}
-    geneNames=[]; timepoints=[]; replicates=[]
-    
-    with open(transcriptomicsDataFile,'r') as f:
-        header=f.readline()
-        labels=header.split('\t')[1:-1]
-        for label in labels:
-            crumbles=label.split('.')
-
-            fraction=crumbles[0]
-            replicate='br'+crumbles[2]
-            timepoint='tp.'+crumbles[4]
-
-            if replicate not in replicates:
-                replicates.append(replicate)
-            if timepoint not in timepoints:
-                timepoints.append(timepoint)
-
-            if fraction not in data.keys():
-                data[fraction]={}
-            if replicate not in data[fraction].keys():
-                data[fraction][replicate]={}
-            if timepoint not in data[fraction][replicate].keys():
-                data[fraction][replicate][timepoint]={}
-            
-        for line in f:
-            vector=line.split('\t')[:-1]
-            values=[float(element) for element in vector[1:]]
-            geneName=vector[0].replace('_','')
-            if geneName not in geneNames:
-                geneNames.append(geneName)
-            for i in range(len(values)):
-                crumbles=labels[i].split('.')
-                fraction=crumbles[0]
-                replicate='br'+crumbles[2]
-                timepoint='tp.'+crumbles[4]
-                data[fraction][replicate][timepoint][geneName]=values[i]
+    data,geneNames,timepoints,replicates=expressionCache.transcriptomicsReader(transcriptomicsDataFile)
     
     return data,geneNames,timepoints,replicates
 
@@ -86,6 +78,14 @@ def transcriptomicsReader():
 # 0.1. paths
 transcriptomicsDataFile='/Volumes/omics4tb/alomana/projects/TLR/data/expression1e3/expressionMatrix.kallisto.txt'
 
+# 0.2. resampling
+numberOfElements=int(1e6)
+resamplingSeed=20190101
+numberOfThreads=4
+
+# 0.3. figures, one per group and one per set of groups drawn together
+figureGroups={'TL':['black.minus','black.plus','blue','red'],'TC':['orange','green']}
+
 # 1. reading data
 print('reading data...')
 
@@ -147,60 +147,20 @@ groupLabels=list(expressionDistributions.keys())
 groupLabels.sort()
 groupLabels.remove('dubious')
 
-theColors=['black','black','black','blue','green','orange','red','yellow']
-theLineStyle=['-',':','--','-','-','-','-','-']
-
-# run specific groups
-
-#groupLabels=['orange','green']
-#theColors=['orange','green']
-
-#groupLabels=['black.minus', 'black.plus','blue','red']
-#theColors=['gainsboro','dimgrey','blue','red']
-
-groupLabels=['yellow']
-theColors=['yellow']
-
-# make a figure of the overal distribution
-x,y=histogrammer(expressionDistributions['all'])
-matplotlib.pyplot.plot(x,y,'-',color='black',lw=1)
-            
-for i in range(len(groupLabels)):
-
-    # resample
-    numberOfElements=int(1e6)
-    workingDist=expressionDistributions[groupLabels[i]]
-    measuredAverage=numpy.mean(workingDist)
-
-    averageDist=[]
-    for j in range(numberOfElements):
-        sample=numpy.random.choice(expressionDistributions['all'],len(workingDist))
-        average=numpy.mean(sample)
-        averageDist.append(average)
-    
-    # hypothesis test
-    higherRandoms=sum(numpy.greater(averageDist,measuredAverage))
-    if higherRandoms > numberOfElements/2:
-        pvalue=1-(higherRandoms/float(numberOfElements))
-    else:
-        pvalue=higherRandoms/float(numberOfElements)
-    print('Group label {} has a deviation whose p-value is {}. Out of {} trials'.format(groupLabels[i],pvalue,numberOfElements))
-    
-    # make a figure of the expected group distribution
-    x,y=histogrammer(averageDist)
-    matplotlib.pyplot.plot(x,y,linestyle=':',color=theColors[i],lw=2,alpha=0.5)    
-    matplotlib.pyplot.axvline(x=measuredAverage,color=theColors[i],linestyle='-',lw=3)
-
-matplotlib.pyplot.xlim([-0.1,4.])
-matplotlib.pyplot.ylim([-0.01,0.6])
+theColors={'black.minus':'gainsboro','black.plus':'dimgrey','blue':'blue','green':'green','orange':'orange','red':'red','yellow':'yellow'}
 
-matplotlib.pyplot.xlabel('mRNA (log$_{10}$ TPM+1)')
-matplotlib.pyplot.ylabel('Probability')
+# 3.1. resample the null of every group at once
+groupLabels.remove('all')
+groups={label:expressionDistributions[label] for label in groupLabels}
+nulls=resamplingNull.groupNulls(expressionDistributions['all'],groups,resamples=numberOfElements,seed=resamplingSeed,numberOfThreads=numberOfThreads)
 
-matplotlib.pyplot.tight_layout()
+# 3.2. hypothesis tests
+for label in groupLabels:
+    print('Group label {} has a deviation whose p-value is {}. Out of {} trials'.format(label,nulls[label]['pvalue'],numberOfElements))
 
-#matplotlib.pyplot.savefig('figure.expression.distribution.TL.pdf')
-#matplotlib.pyplot.savefig('figure.expression.distribution.TC.pdf')
-matplotlib.pyplot.savefig('figure.expression.distribution.yellow.pdf')
+# 3.3. figures, one per group and one per set of groups
+for label in groupLabels:
+    distributionPlotter(expressionDistributions['all'],nulls,[label],theColors,'figure.expression.distribution.{}.pdf'.format(label))
 
-matplotlib.pyplot.clf()
+for name in figureGroups:
+    distributionPlotter(expressionDistributions['all'],nulls,figureGroups[name],theColors,'figure.expression.distribution.{}.pdf'.format(name))
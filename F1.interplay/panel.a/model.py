@@ -3,6 +3,8 @@
 ###
 
 import sys,os,numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','library'))
+import annotationDatabase,deseqTables
 import matplotlib,matplotlib.pyplot
 
 matplotlib.rcParams.update({'font.size':18,'font.family':'Arial','xtick.labelsize':14,'ytick.labelsize':14})
@@ -227,83 +229,47 @@ def significanceReaderHD():
     This function retrieves the significance defined by DESeq2.
     '''
 
-    rawPositions={} # rawPositions[geneName]=[[trna.fc,trna.p-value],[rbf.fc,rbf.p-value]]
+    changes={} # changes[geneName]=[[trna.fc,trna.p-value],[rbf.fc,rbf.p-value]]
 
     sampleTypes=['trna','rbf']
 
-    for sampleType in sampleTypes:
-        dataFile=dataDirHD+'significance.{}.condition_tp.4_vs_tp.1.csv'.format(sampleType)
-        
-        with open(dataFile,'r') as f:
-            next(f)
-            for line in f:
-                vector=line.split(',')
-                
-                geneName=(vector[0].replace('_','')).replace('"','')
-                
-                if vector[-1] != 'NA\n':
-                    adj=float(vector[-1])
-                else:
-                    adj=1
-
-                log2fc=float(vector[2])
-
-                if geneName not in rawPositions:
-                    rawPositions[geneName]=[[log2fc,adj]]
-                else:
-                    rawPositions[geneName].append([log2fc,adj])
-
-    limited=[]
-    for geneName in rawPositions:
-        if len(rawPositions[geneName]) != 2:
-            limited.append(geneName)
-    changes={}
-    for geneName in rawPositions:
-        if geneName not in limited:
-            changes[geneName]=rawPositions[geneName]
+    # only genes present in both tables are retained
+    tables=[deseqTables.significanceReader(dataDirHD+'significance.{}.condition_tp.4_vs_tp.1.csv'.format(sampleType)) for sampleType in sampleTypes]
+    genes=deseqTables.commonGenes(tables)
+    log2fc=deseqTables.columnJoiner(tables,'log2FC',genes)
+    adj=deseqTables.columnJoiner(tables,'padj',genes)
+    adj[numpy.isnan(adj)]=1
+
+    log2fc=log2fc.T.tolist(); adj=adj.T.tolist()
+    for i,geneName in enumerate(genes.tolist()):
+        geneName=geneName.replace('_','')
+        changes[geneName]=[[log2fc[i][j],adj[i][j]] for j in range(len(sampleTypes))]
             
     return changes
 
 def synonymsReader():
 
     '''
-    This function reads a GFF3 file and returns synonyms. EG: VNG_RS00010 --> VNG0001H.
+    This function reads the annotation database built from the GFF3 file and returns synonyms. EG: VNG_RS00010 --> VNG0001H.
     '''
 
     synonyms={}
-    definedGenes=[]
     proteinFunctions={}
 
-    with open(gff3File,'r') as f:
-        for line in f:
-            vector=line.split('\t')
-            if vector[0][0] != '#':
-                info=vector[-1].replace('\n','')
+    annotation=annotationDatabase.annotationReader(gff3File)
+    IDs=annotation['ID'].tolist()
+    products=annotation['product'].tolist()
+    productSources=annotation['productSource'].tolist()
 
-                if len(vector) > 2:
-                    if vector[2] == 'gene':
-                        geneID=info.split('ID=')[1].split(';')[0]
-                        definedGenes.append(geneID)
-                
-                if 'old_locus_tag=' in info:
-                    old=info.split('old_locus_tag=')[1].split(';')[0]
-                    new=info.split('ID=')[1].split(';')[0].replace('_','')
-
-                    if '%' in old:
-                        olds=old.split('%2C')
-                        for element in olds:
-                            synonyms[new]=element
-                    else:
-                        synonyms[new]=old
-
-                # obtaining info about protein names
-                if len(vector) > 2:
-                    if vector[1] == 'Protein Homology':
-                        geneID=info.split('Parent=')[1].split(';')[0].replace('_','')
-                        proteinFunction=info.split('product=')[1].split(';')[0]
-                        proteinFunctions[geneID]=proteinFunction
-
-    definedGenes.sort()
+    for row in range(len(IDs)):
+        new=IDs[row].replace('_','')
+        olds=annotationDatabase.oldTagsFinder(annotation,row)
+        if len(olds) != 0:
+            synonyms[new]=olds[-1]
+
+        # obtaining info about protein names
+        if productSources[row] == 'Protein Homology':
+            proteinFunctions[new]=products[row]
 
     return synonyms,proteinFunctions
 
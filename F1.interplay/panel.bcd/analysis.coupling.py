@@ -10,10 +10,12 @@
 ### (Section 4.2) a control for transcript half-life. "TE.control.half-life.pdf "
 ### (Section 5) an analysis about the relationship of expression and half-life. "expression.half-life.pdf"
 
-import sys,math,pandas,seaborn
+import os,sys,pandas,seaborn
+import multiprocessing,multiprocessing.pool
 import numpy,numpy.linalg
 import scipy,scipy.stats
-import statsmodels,statsmodels.api,statsmodels.sandbox,statsmodels.sandbox.regression,statsmodels.sandbox.regression.predstd
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','library'))
+import cloudPlotter,detCaller,fastaIndex,groupedStatistics,regressionIntervals,slopeBootstrap,translationalEfficiency
 
 import matplotlib,matplotlib.pyplot
 matplotlib.rcParams.update({'font.size':18,'font.family':'Arial','xtick.labelsize':14,'ytick.labelsize':14})
@@ -22,63 +24,40 @@ matplotlib.rcParams['pdf.fonttype']=42
 def DETreader():
 
     '''
-    This function reads the DETs from sleuth and provides a dictionary as 
-    DETs[timepoint][geneName]=1/-1
-    DETs of abs(FC) < 2 and max expression < 10 TPMs will be excluded.
+    This function reads the DETs from sleuth and provides boolean masks over geneNames as
+    DETs[up|down][timepoint]=mask
+    DETs of abs(log2 FC) < 1 or max expression < 10 TPMs are excluded.
     '''
 
-    DETs={}
-    # iterate over each time point to retrieve the DETs
-    for timepoint in timepoints[1:]:
-        DETs[timepoint]={}            
+    # fold changes of the mean mRNA TPMs against the first time point, for all genes and time points at once
+    means=numpy.mean(expressionTensors['trna'],axis=2)
+    log2FC,up,down=detCaller.foldChangeFilter(means[:,1:],means[:,[0]])
 
+    # restrict to transcripts tested by sleuth at each time point
+    geneIndex={geneNames[i]:i for i in range(len(geneNames))}
+    DETs={}; DETs['up']={}; DETs['down']={}
+    for i in range(1,len(timepoints)):
+        timepoint=timepoints[i]
         flag=timepoint[-1]+'1'
-        fileName='sleuthResultsRNA.{}.csv'.format(flag)
-        filePath=DETsDir+fileName
-
-        with open(filePath,'r') as f:
-            next(f)
-            for line in f:
-                vector=line.split(',')
-                ncName=vector[1].replace('"','')
-                geneName=NCsynonyms[ncName]
-
-                # filter out abs(log2FC) < 1 or max expression < 10 TPMs
-                rna0=numpy.mean([rnaExpression['trna'][replicate]['tp.1'][geneName] for replicate in replicates])
-                rna1=numpy.mean([rnaExpression['trna'][replicate][timepoint][geneName] for replicate in replicates])
-                log2fc=numpy.log2(rna1/rna0)
-
-                if abs(log2fc) > 1 and numpy.max([rna0,rna1]) > 10:
-                    if log2fc > 0:
-                        flag=1
-                    else:
-                        flag=-1
-                    DETs[timepoint][geneName]=flag
+        table=detCaller.sleuthReader(DETsDir+'sleuthResultsRNA.{}.csv'.format(flag))
+        tested=detCaller.testedMask(table,NCsynonyms,geneIndex)
+        DETs['up'][timepoint]=tested & up[:,i-1]
+        DETs['down'][timepoint]=tested & down[:,i-1]
 
     return DETs
 
-def dotColorFinder(timepoint,geneName,cloudType):
+def dotColorFinder(rows,up,down):
 
     '''
-    This function defines dot colors depending on being a DET.
+    This function defines dot colors of genes, given as rows of geneNames, depending on being a DET. up and down are the DET masks of a time point, None for the first one.
     '''
 
-    if timepoint == 'tp.1':
-        dotColor='noColor'
-    else:
-        
-        if geneName not in DETs[timepoint].keys():
-            dotColor='noColor'
-        else:
-            if DETs[timepoint][geneName] == 1:
-                dotColor='red'
-            elif DETs[timepoint][geneName] == -1:
-                dotColor='blue'
-            else:
-                print('error')
-                sys.exit()
-    
-    return dotColor
+    dotColors=numpy.full(len(rows),'noColor',dtype='<U7')
+    if up is not None:
+        dotColors[up[rows]]='red'
+        dotColors[down[rows]]='blue'
+
+    return dotColors.tolist()
 
 def halfLifesReader():
 
@@ -100,142 +79,243 @@ def halfLifesReader():
 def NCsynonymsReader():
 
     '''
-    This function builds a dictionary on the synonyms from NC to RS.
+    This function builds a dictionary on the synonyms from NC to RS, together with transcript lengths, from the transcriptome FASTA index.
     '''
 
     NCsynonyms={}; transcriptLengths={}
-    
-    firstLine=True
-    with open(transcriptomeAnnotationFile,'r') as f:
-        for line in f:
-            if line[0] == '>':
-
-                # append final length
-                if firstLine == False:
-                    #transcriptLengths[rsName]=numpy.log10(transcriptLength)
-                    transcriptLengths[rsName]=transcriptLength
-
-                # obtain synonyms
-                vector=line.split(' ')
-                ncName=vector[0].replace('>','')
-                for element in vector:
-                    if 'locus_tag' in element:
-                        rsName=element.split('locus_tag=')[1].replace(']','').replace('_','')
-                NCsynonyms[ncName]=rsName
-
-                # reset transcript length
-                transcriptLength=0
-                
-            else:
-                firstLine=False
-                v=list(line)
-
-                transcriptLength=transcriptLength+len(v)-1
-        #transcriptLengths[rsName]=numpy.log10(transcriptLength)
-        transcriptLengths[rsName]=transcriptLength
+
+    index,ncNames=fastaIndex.fastaIndexReader(transcriptomeAnnotationFile)
+    for ncName in ncNames:
+        rsName=index[ncName]['attributes']['locus_tag'].replace('_','')
+        NCsynonyms[ncName]=rsName
+        transcriptLengths[rsName]=index[ncName]['length']
 
     return NCsynonyms,transcriptLengths
 
-def regressionAnalysis(x,y):
+def regulationTester(regulationDeviations):
 
     '''
-    This function performs regression analysis based on:
-    http://markthegraph.blogspot.com/2015/05/using-python-statsmodels-for-ols-linear.html
+    This function runs the Mann-Whitney U tests of deviations from the TE model between DET classes (DET+ vs DET-, DET+ vs noDET and noDET vs DET-)
+    for every time point and expression range in a single batched call. Tests with less than 10 observations in a class are reported as NaN.
+    It prints the results table, stores it as a text file and returns it.
     '''
 
-    # f.0 run a simple correlation analysis
-    print('\t regression results:')
-    slope,intercept,r_value,p_value,std_err=scipy.stats.linregress(x,y)
-    print('\t\t slope',slope)
-    print('\t\t intercept',intercept)
-    print('\t\t r_value',r_value)
-    print('\t\t pvalue',p_value)
-    print('\t\t std_err',std_err)
-
-    # f.1. build regression model
-    xc=statsmodels.api.add_constant(x) # constant intercept term
-    model=statsmodels.api.OLS(y,xc)
-    fitted=model.fit()
-
-    #print(fitted.params)     # the estimated parameters for the regression line
-    #print(fitted.summary())  # summary statistics for the regression
-
-    # f.2. interpolate model
-    a=x.min()
-    b=x.max()
-    x_pred=numpy.linspace(a,b,100)
-    x_pred2=statsmodels.api.add_constant(x_pred)
-    y_pred=fitted.predict(x_pred2)
-    regressionLine=[x_pred,y_pred]
-
-    # f.3. compute CI
-    y_hat=fitted.predict(xc)
-    y_err=y-y_hat
-    mean_x=xc.T[1].mean()
-    n=len(xc)
-    dof=n-fitted.df_model-1
-    t=scipy.stats.t.ppf(1-0.025,df=dof)
-    s_err=numpy.sum(numpy.power(y_err, 2))
-    conf = t * numpy.sqrt((s_err/(n-2))*(1.0/n + (numpy.power((x_pred-mean_x),2) / ((numpy.sum(numpy.power(x_pred,2))) - n*(numpy.power(mean_x,2))))))
-    upper=y_pred+abs(conf)
-    lower=y_pred-abs(conf)
-    CI=[upper,lower]
-
-    # f.4. compute PI
-    sdevP,lowerP,upperP=statsmodels.sandbox.regression.predstd.wls_prediction_std(fitted,exog=x_pred2,alpha=0.05)
-    PI=[upperP,lowerP]
-
-    return regressionLine,CI,PI
-
-def transcriptionalRegulationAnalyzer():
+    timepointLabels,ceilings,subsetCodes,distances=[numpy.concatenate(element) for element in zip(*regulationDeviations)]
+    groupCodes,groups=groupedStatistics.groupCoder(timepointLabels,ceilings)
+    comparisons=[('b.DET+','d.DET-'),('b.DET+','c.noDET'),('c.noDET','d.DET-')]
+    results=groupedStatistics.pairwiseRankTests(distances,groupCodes,subsetCodes,comparisons,minimumSize=10)
+    results['timepoint']=numpy.array([groups[element][0] for element in results['group']])
+    results['ceiling']=numpy.array([groups[element][1] for element in results['group']])
+
+    with open('TE.transcriptional.regulation.tests.txt','w') as f:
+        f.write('timepoint\tceiling\tfirst\tsecond\tnFirst\tnSecond\tstatistic\tpvalue\n')
+        for i in range(len(results['group'])):
+            line='{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}'.format(results['timepoint'][i],results['ceiling'][i],results['first'][i],results['second'][i],results['nFirst'][i],results['nSecond'][i],results['statistic'][i],results['pvalue'][i])
+            print('\t\t {}'.format(line))
+            f.write(line+'\n')
+
+    return results
+
+def resultsTableBuilder(TE,DETs,deviationMatrix,transcriptLengthArray,halfLifeArray,geneNames,timepoints):
 
     '''
-    This function builds a figure with the distribution of distances from expected model, across different levels of expression, for three different sets of transcripts: all, no DET, DET+ and DET-.
+    This function arranges the per-gene results of all time points as columns of a table with one row per gene and time point:
+    gene, timepoint, m, r, rsemM, rsemF, footprint (with/without/filtered), DET (up/down/none), deviation (up/neutral/down, empty if not fitted),
+    transcriptLength and halfLife (0 if unknown).
     '''
 
-    print('\t\t working on transcriptional regulation association figure...')
+    numberOfGenes=len(geneNames); numberOfTimepoints=len(timepoints)
 
-    # f.1. build a dictionary of dictionaries with the following structure:
-    # distSets[1|2|3|4|5][all|noDET|DET+|DET-]=list of y distance to regression line
+    footprint=numpy.full((numberOfGenes,numberOfTimepoints),'filtered',dtype='<U8')
+    footprint[TE['withFootprint']]='with'
+    footprint[TE['withoutFootprint']]='without'
+
+    DET=numpy.full((numberOfGenes,numberOfTimepoints),'none',dtype='<U4')
+    for t in range(numberOfTimepoints):
+        if timepoints[t] in DETs['up']:
+            DET[DETs['up'][timepoints[t]],t]='up'
+            DET[DETs['down'][timepoints[t]],t]='down'
+
+    table={}
+    table['gene']=numpy.repeat(numpy.array(geneNames,dtype=numpy.str_),numberOfTimepoints)
+    table['timepoint']=numpy.tile(numpy.array(timepoints,dtype=numpy.str_),numberOfGenes)
+    for key in ['m','r','rsemM','rsemF']:
+        table[key]=TE[key].ravel()
+    table['footprint']=footprint.ravel()
+    table['DET']=DET.ravel()
+    table['deviation']=deviationMatrix.ravel()
+    table['transcriptLength']=numpy.repeat(transcriptLengthArray,numberOfTimepoints)
+    table['halfLife']=numpy.repeat(halfLifeArray,numberOfTimepoints).astype(numpy.float64)
+
+    return table
+
+def timepointAnalyzer(task):
+
+    '''
+    This function performs the TE analysis of a single time point: regression and resampling of the TE model, the TE trend figure with PI colouring
+    and the TE vs transcriptional regulation figure. It only depends on its task, so that time points can be analysed in parallel processes.
+    It returns a dictionary with the points and controls of the time point, to be merged across time points.
+    '''
+
+    timepoint=task['timepoint']; t=task['t']; geneNames=task['geneNames']; fit=task['fit']
+    m=task['TE']['m']; r=task['TE']['r']
+    up,down=task['DETs']
+    figureName='figures/TE.trend.{}.pdf'.format(timepoint)
+
+    result={}
+    result['timepoint']=timepoint
+    result['controlLength']={}; result['controlHalfLife']={}; result['expression2halfLife']={}
+
+    # necessary for transcriptional regulation analysis figure
+    expSet={}
+
+    # partition of transcripts with or without footprints, in gene order
+    dotColors={}
+    for cloudType,label in [('ground','withoutFootprint'),('cloud','withFootprint')]:
+        rows=numpy.flatnonzero(task['TE'][label])
+        names=[geneNames[i] for i in rows]
+
+        # required for TE vs transcriptional regulation analysis
+        colors=dotColorFinder(rows,up,down)
+        dotColors.update(zip(rows.tolist(),colors))
+        if cloudType == 'ground':
+            hollowx=m[rows].tolist(); hollowy=r[rows].tolist()
+        else:
+            setx=m[rows].tolist(); sety=r[rows].tolist(); setNames=names; cloudRows=rows
+
+        # for length control
+        result['controlLength'][label]=[task['transcriptLengths'][rows].tolist(),r[rows].tolist()]
+
+        # for half-live
+        halfLifes=task['halfLifes']
+        stable=rows[(halfLifes[rows] > 1) & (halfLifes[rows] < 25)]
+        result['controlHalfLife'][label]=[halfLifes[stable].tolist(),r[stable].tolist()]
+
+        # for expression vs half-life comparison
+        expressed=stable[m[stable] > 0]
+        result['expression2halfLife'][label]=[m[expressed].tolist(),halfLifes[expressed].tolist()]
+
+    for i in sorted(dotColors):
+        expSet[geneNames[i]]=[m[i],r[i],dotColors[i]]
+
+    result['setx']=setx; result['sety']=sety; result['hollowx']=hollowx; result['hollowy']=hollowy
+
+    # perform regression analysis
+    print('\t regression results for {}:'.format(timepoint))
+    print('\t\t slope',fit['slope'])
+    print('\t\t intercept',fit['intercept'])
+    print('\t\t r_value',fit['r'])
+    print('\t\t pvalue',fit['p'])
+    print('\t\t std_err',fit['stderr'])
+
+    # resampling: genes and replicates within genes for slope CIs, permutations for the null distribution of the slope
+    slopeUncertainty={}
+    slopeUncertainty['genes']=slopeBootstrap.slopeBootstrap(setx,sety,resamples=task['bootstrapResamples'],mode='genes',seed=[task['bootstrapSeed'],t,0],numberOfThreads=1)
+    slopeUncertainty['replicates']=slopeBootstrap.replicateBootstrap(task['cloudTensors'][0],task['cloudTensors'][1],resamples=task['bootstrapResamples'],seed=[task['bootstrapSeed'],t,1],numberOfThreads=1)
+    slopeUncertainty['null']=slopeBootstrap.slopeBootstrap(setx,sety,resamples=task['bootstrapResamples'],mode='permutation',seed=[task['bootstrapSeed'],t,2],numberOfThreads=1)
+    print('\t\t slope 95% CI, genes resampled',slopeUncertainty['genes']['slopeCI'])
+    print('\t\t slope 95% CI, replicates resampled',slopeUncertainty['replicates']['slopeCI'])
+    print('\t\t slope null 95% interval',slopeUncertainty['null']['slopeCI'])
+    print('\t\t slope permutation pvalue',slopeUncertainty['null']['pvalue'])
+    result['slopeUncertainty']=slopeUncertainty
 
-    for geneName in expSet:
+    # compute for the model
+    slope=fit['slope']
+    intercept=fit['intercept']
+    expected=list(slope*numpy.array(setx)+intercept)
 
-        # recovering information
-        mRNA=expSet[geneName][0]
-        r=expSet[geneName][1]
+    # predicted value
+    expression2Predict=100
+    predictedRatio=slope*numpy.array(numpy.log10(expression2Predict))+intercept
+    predictedValue=(2**predictedRatio)*expression2Predict
+    print('\t\t predicted value:',predictedValue)
+
+    # computed model
+    satx=numpy.arange(0,10000,1)
+    factor=slope*numpy.log10(satx+1) + intercept + numpy.log2(satx+1)
+    saty=(2**(factor))-1
+    result['sat']=[list(satx),list(saty)]
 
-        colorLabel=expSet[geneName][2]
-        if colorLabel == 'noColor':
-            subset='c.noDET'
-        if colorLabel == 'red':
-            subset='b.DET+'
-        if colorLabel == 'blue':
-            subset='d.DET-'
+    # plot figure
+    figure=matplotlib.pyplot.figure()
+    cloudPlotter.cloudPlotter(setx,sety,color='black',alpha=0.05,rasterized=task['rasterizedClouds'])
+    cloudPlotter.cloudPlotter(hollowx,hollowy,color='tan',alpha=0.05,rasterized=task['rasterizedClouds'])
+    matplotlib.pyplot.plot(setx,expected,'-',lw=2,color=task['color'])
 
-        # deal with expression range
-        ceiling=math.ceil(mRNA)
+    # PI analysis
+    regressionLine,CI,PI=regressionIntervals.regressionAnalysis(setx,sety,fit=fit)
+    matplotlib.pyplot.plot(regressionLine[0],regressionLine[1],color='black',lw=1)
+    matplotlib.pyplot.fill_between(regressionLine[0],PI[1],PI[0],color='black',alpha=0.1,lw=0)
+    # check if values are above or below PI, evaluated at each point
+    deviationLabels,limitTop,limitBottom=regressionIntervals.outlierClassifier(fit,setx,sety)
+    devColors=numpy.full(len(setNames),'black',dtype='<U5')
+    devColors[deviationLabels == 1]='red'
+    devColors[deviationLabels == -1]='blue'
+    result['diagonalDeviations']={}
+    result['deviation']=numpy.full(len(geneNames),'',dtype='<U7')
+    for label,code in [('up',1),('neutral',0),('down',-1)]:
+        result['diagonalDeviations'][label]=[setNames[i] for i in numpy.flatnonzero(deviationLabels == code)]
+        result['deviation'][cloudRows[deviationLabels == code]]=label
+    # plot the points
+    cloudPlotter.cloudPlotter(setx,sety,color=devColors.tolist(),markerSize=4,marker='.',rasterized=task['rasterizedClouds'])
         
-        # deal with distance to diagonal
-        expected=m*mRNA+c
-        distance=r-expected
-
-        # append the distance into structure
-        if ceiling not in distSets.keys():
-            distSets[ceiling]={}
-
-        if 'a.all' not in distSets[ceiling].keys():
-            distSets[ceiling]['a.all']=[]
-        if 'c.noDET' not in distSets[ceiling].keys():
-            distSets[ceiling]['c.noDET']=[]
-        if 'b.DET+' not in distSets[ceiling].keys():
-            distSets[ceiling]['b.DET+']=[]
-        if 'd.DET-' not in distSets[ceiling].keys():
-            distSets[ceiling]['d.DET-']=[]
-
-        distSets[ceiling]['a.all'].append(distance)
-        distSets[ceiling][subset].append(distance)
+    matplotlib.pyplot.xlabel('mRNA [log$_{10}$ TPM+1]')
+    matplotlib.pyplot.ylabel('footprint/mRNA [log$_{2}$ ratio]')
+
+    matplotlib.pyplot.xlim([-0.1,5.3])
+    matplotlib.pyplot.ylim([-15.2,8.4])
+
+    matplotlib.pyplot.grid(True,alpha=0.5,ls=':')
+
+    matplotlib.pyplot.tight_layout()
+    matplotlib.pyplot.savefig(figureName)
+    matplotlib.pyplot.close(figure)
+
+    print('\t completed analysis for {}.\n'.format(timepoint))
+
+    # call function to create PLOT3, i.e., TE vs transcriptional regulation
+    if timepoint != 'tp.1':
+        result['regulationDeviations']=transcriptionalRegulationAnalyzer(timepoint,expSet,slope,intercept)
+    else:
+        result['regulationDeviations']=None
+
+    return result
+
+def transcriptionalRegulationAnalyzer(timepoint,expSet,m,c):
+
+    '''
+    This function builds a figure with the distribution of distances from expected model, across different levels of expression, for three different sets of transcripts: all, no DET, DET+ and DET-.
+    expSet[geneName]=[mRNA,TE,dot color] and m,c are the slope and intercept of the TE model.
+    It returns the deviations as [time point labels,expression ranges,DET classes,distances] for the rank tests.
+    '''
+
+    print('\t\t working on transcriptional regulation association figure...')
+
+    # f.1. build a dictionary of dictionaries with the following structure:
+    # distSets[1|2|3|4|5][all|noDET|DET+|DET-]=list of y distance to regression line
+    # expression ranges, DET classes and distances to diagonal are computed for all genes at once
+    subsetLabels={'noColor':'c.noDET','red':'b.DET+','blue':'d.DET-'}
+    mRNA=numpy.array([expSet[geneName][0] for geneName in expSet])
+    r=numpy.array([expSet[geneName][1] for geneName in expSet])
+    subsetCodes=numpy.array([subsetLabels[expSet[geneName][2]] for geneName in expSet])
+    ceilings=numpy.ceil(mRNA).astype(int)
+    distances=r-(m*mRNA+c)
+
+    distSets={}
+    boxCodes,boxes=groupedStatistics.groupCoder(ceilings)
+    for i in range(len(boxes)):
+        ceiling=boxes[i][0]
+        inBox=boxCodes == i
+        distSets[ceiling]={}
+        distSets[ceiling]['a.all']=distances[inBox].tolist()
+        for subset in ['b.DET+','c.noDET','d.DET-']:
+            distSets[ceiling][subset]=distances[inBox & (subsetCodes == subset)].tolist()
+
+    # keep the deviations for the batched rank tests across time points
+    deviations=[numpy.full(len(distances),timepoint),ceilings,subsetCodes,distances]
 
     # f.2. build the figure
+    figure=matplotlib.pyplot.figure()
     expressionBoxes=list(distSets.keys())
     expressionBoxes.sort()
     subsets=list(distSets[expressionBoxes[0]].keys())
@@ -243,50 +323,26 @@ def transcriptionalRegulationAnalyzer():
 
     # create a dataframe for plotting with seaborn
     pos=0
-    deviations=[]
+    boxDeviations=[]
     posStamps=[]
     numberEvents=[]
     for box in expressionBoxes:
         for subset in subsets:
             pos=pos+1
             # empty addition
-            deviations.append(None);posStamps.append(pos)
+            boxDeviations.append(None);posStamps.append(pos)
             rank=len(distSets[box][subset])
             numberEvents.append(rank)
-
-            # perform a test if subset equals DET-
-            if subset == 'b.DET+':
-                lastPlus=distSets[box][subset]
-            if subset == 'c.noDET':
-                lastFlat=distSets[box][subset]
-            if subset == 'd.DET-':
-                lastMinus=distSets[box][subset]
-
-                if min([len(lastPlus),len(lastMinus)]) >= 10:
-                    statistic,pvalue=scipy.stats.mannwhitneyu(lastPlus,lastMinus)
-                    print('\t\t\t plus vs minus',len(lastPlus),len(lastMinus),statistic,pvalue)
-
-                    statistic,pvalue=scipy.stats.mannwhitneyu(lastPlus,lastFlat)
-                    print('\t\t\t plus vs noDET',len(lastPlus),len(lastFlat),statistic,pvalue)
-
-                    statistic,pvalue=scipy.stats.mannwhitneyu(lastFlat,lastMinus)
-                    print('\t\t\t noDET vs minus',len(lastFlat),len(lastMinus),statistic,pvalue)
-
-                    print()
-                    
-                else:
-                    print('\t\t\t bypassing test with upregulated and downregulated DET ranks',len(lastPlus),len(lastMinus))
-                    print()
             
             # add values for pandas dataframe
             if rank >= 10 and box in [2,3,4]: # no boxplots for less than 10 observations
                 for element in distSets[box][subset]:
-                    deviations.append(element)
+                    boxDeviations.append(element)
                     posStamps.append(pos)
-        deviations.append(None)
+        boxDeviations.append(None)
         pos=pos+1; posStamps.append(pos)
 
-    deviationData=list(zip(posStamps,deviations))
+    deviationData=list(zip(posStamps,boxDeviations))
     df=pandas.DataFrame(data=deviationData,columns=['Subsets','Deviation'])
 
     # plot violin and swarm plots with seaborn
@@ -321,58 +377,11 @@ def transcriptionalRegulationAnalyzer():
     figureName='figures/TE.transcriptional.regulation.{}.pdf'.format(timepoint)
     matplotlib.pyplot.tight_layout()
     matplotlib.pyplot.savefig(figureName)
-    matplotlib.pyplot.clf()
+    matplotlib.pyplot.close(figure)
 
     print('\t\t figure completed.')
 
-    return None
-
-def transcriptomicsReader():
-
-    '''
-    this function reads transcriptomics data as in
-    transcriptomics[trna/rbf][replicate][timepoint][gene]
-    '''
-
-    data={}
-    geneNames=[]; timepoints=[]; replicates=[]
-    
-    with open(transcriptomicsDataFile,'r') as f:
-        header=f.readline()
-        labels=header.split('\t')[1:-1]
-        for label in labels:
-            crumbles=label.split('.')
-
-            fraction=crumbles[0]
-            replicate='br'+crumbles[2]
-            timepoint='tp.'+crumbles[4]
-
-            if replicate not in replicates:
-                replicates.append(replicate)
-            if timepoint not in timepoints:
-                timepoints.append(timepoint)
-
-            if fraction not in data.keys():
-                data[fraction]={}
-            if replicate not in data[fraction].keys():
-                data[fraction][replicate]={}
-            if timepoint not in data[fraction][replicate].keys():
-                data[fraction][replicate][timepoint]={}
-            
-        for line in f:
-            vector=line.split('\t')[:-1]
-            values=[float(element) for element in vector[1:]]
-            geneName=vector[0].replace('_','')
-            if geneName not in geneNames:
-                geneNames.append(geneName)
-            for i in range(len(values)):
-                crumbles=labels[i].split('.')
-                fraction=crumbles[0]
-                replicate='br'+crumbles[2]
-                timepoint='tp.'+crumbles[4]
-                data[fraction][replicate][timepoint][geneName]=values[i]
-    
-    return data,geneNames,timepoints,replicates
+    return deviations
 
 ###
 ### MAIN
@@ -392,11 +401,24 @@ DETsDir='/Volumes/omics4tb/alomana/projects/TLR/data/sleuth1e3/'
 halfLifesFile='/Volumes/omics4tb/alomana/projects/TLR/data/halfLife/formattedHalfLifes.strains.txt'
 scratchDir='/Volumes/omics4tb/alomana/scratch/'
 
+# 0.2. resampling of the TE model
+bootstrapResamples=10000
+bootstrapSeed=20190101
+numberOfThreads=4
+
+# 0.3. figures, point clouds are rasterized inside the vector PDFs at cloudResolution dpi
+rasterizedClouds=True
+cloudResolution=300
+matplotlib.rcParams['savefig.dpi']=cloudResolution
+
+# 0.4. per-gene results are stored as TE.results.npz, together with a TSV copy if requested
+tsvResults=True
+
 # 1. reading data
 print('reading data...')
 
-# 1.1. reading mRNA data
-rnaExpression,geneNames,timepoints,replicates=transcriptomicsReader()
+# 1.1. reading mRNA data as tensors T[trna/rbf][gene,timepoint,replicate]
+expressionTensors,geneNames,timepoints,replicates=translationalEfficiency.tensorReader(transcriptomicsDataFile)
 
 # 1.2. read DETs
 NCsynonyms,transcriptLengths=NCsynonymsReader()
@@ -405,6 +427,11 @@ DETs=DETreader()
 # 1.3. read half-lifes
 halfLifes=halfLifesReader()
 
+# 1.4. compute TE for all genes and time points
+TE=translationalEfficiency.efficiencyComputer(expressionTensors['trna'],expressionTensors['rbf'])
+transcriptLengthArray=numpy.array([transcriptLengths[geneName] for geneName in geneNames])
+halfLifeArray=numpy.array([halfLifes[geneName] if geneName in halfLifes else 0 for geneName in geneNames])
+
 # 2. perform analysis
 print('')
 print('TE analysis for each time point...')
@@ -414,8 +441,13 @@ matplotlib.pyplot.plot([0,0],[1,1],'ok')
 matplotlib.pyplot.savefig('{}temp.pdf'.format(scratchDir))
 matplotlib.pyplot.clf()
 
-# 2.1. build figures on general pattern
+# 2.1. fit the TE trend of transcripts with footprints for all time points at once
+trendFits=regressionIntervals.regressionFitter([TE['m'][TE['withFootprint'][:,t],t] for t in range(len(timepoints))],[TE['r'][TE['withFootprint'][:,t],t] for t in range(len(timepoints))])
+
+# 2.2. build figures on general pattern
 sat=[] # needed for second part of the script, the pattern model
+regulationDeviations=[] # deviations from the TE model per time point, for the rank tests between DET classes
+slopeUncertainty={} # slopeUncertainty[timepoint][genes|replicates|null]=resampling results
 diagonalDeviations={} # diagonalDeviations[TP1|TP2|TP3|TP4][up|neutral|down]=[name1,name2,name3,...]
 
 totalSetx=[]; totalSety=[]; totalHollowx=[]; totalHollowy=[]
@@ -427,184 +459,58 @@ controlHalfLife={}; controlHalfLife['withFootprint']=[[],[]]; controlHalfLife['w
 # expression vs half-life analysis
 expression2halfLife={}; expression2halfLife['withFootprint']=[[],[]]; expression2halfLife['withoutFootprint']=[[],[]]
 
-for timepoint in timepoints:
-
-    figureName='figures/TE.trend.{}.pdf'.format(timepoint)
-
-    setx=[]; sety=[]; setNames=[]
-    hollowx=[]; hollowy=[]
-    cloudColors=[]; groundColors=[]
-
-    # necessary for transcriptional regulation analysis figure
-    expSet={}
-    distSets={} # to be constructed inside transcriptionalRegulationAnalyzer function
-
-    # necessary for deviation and expression of upregulated genes
-    diagonalDeviations[timepoint]={}
-    diagonalDeviations[timepoint]['up']=[]; diagonalDeviations[timepoint]['neutral']=[]; diagonalDeviations[timepoint]['down']=[]
-    
-    for geneName in geneNames:
-
-        transcriptLength=transcriptLengths[geneName]
-        if geneName in halfLifes:
-            transcriptHalfLife=halfLifes[geneName]
-        else:
-            transcriptHalfLife=0
-        
-        # check consistency of mRNA
-        mRNA_TPMs=[]; footprint_TPMs=[]
-        for replicate in replicates:
-            mRNA_TPMs.append(rnaExpression['trna'][replicate][timepoint][geneName])
-            footprint_TPMs.append(rnaExpression['rbf'][replicate][timepoint][geneName])
-            
-        # data transformations and quality check
-        log2M=numpy.log2(numpy.array(mRNA_TPMs)+1)
-        log10M=numpy.log10(numpy.array(mRNA_TPMs)+1)
-        log2F=numpy.log2(numpy.array(footprint_TPMs)+1)
-
-        # noise
-        if numpy.max(log2M) > numpy.log2(10+1): # if expression is below 10 TPMs, don't consider noise
-            sem=numpy.std(log2M)/numpy.sqrt(len(log2M))
-            rsem_mRNA=sem/numpy.mean(log2M)
-        else:
-            rsem_mRNA=0
-            
-        if numpy.max(log2F) > numpy.log2(10+1): # if expression is below 10 TPMs, don't consider noise
-            sem=numpy.std(log2F)/numpy.sqrt(len(log2F))
-            rsem_RF=sem/numpy.mean(log2F)
-        else:
-            rsem_RF=0
-        
-        # medians and ratio
-        m=numpy.median(log10M)
-        r=numpy.median(log2F)-numpy.median(log2M)
-
-        # differenciate between trasncripts with or without footprints
-        if (numpy.median(footprint_TPMs) == 0) or (numpy.median(mRNA_TPMs) < 1):
-            if rsem_mRNA < 0.3:
-
-                hollowx.append(m); hollowy.append(r)
-                totalHollowx.append(m); totalHollowy.append(r)
-
-                # required for TE vs transcriptional regulation analysis
-                dotColor=dotColorFinder(timepoint,geneName,'ground')
-                groundColors.append(dotColor)
-                expSet[geneName]=[m,r,dotColor]
-
-                # for length control
-                controlLength['withoutFootprint'][0].append(transcriptLength)
-                controlLength['withoutFootprint'][1].append(r)
-
-                # for half-live
-                if transcriptHalfLife > 1 and transcriptHalfLife < 25:
-                    controlHalfLife['withoutFootprint'][0].append(transcriptHalfLife)
-                    controlHalfLife['withoutFootprint'][1].append(r)
-
-                    # for expression vs half-life comparison
-                    if m > 0:
-                        expression2halfLife['withoutFootprint'][0].append(m)
-                        expression2halfLife['withoutFootprint'][1].append(transcriptHalfLife)
-                        
-        else:
-            if rsem_mRNA < 0.3 and rsem_RF < 0.3:        
-
-                setx.append(m); sety.append(r); setNames.append(geneName)
-                totalSetx.append(m); totalSety.append(r)
-
-                # required for TE vs transcriptional regulation analysis
-                dotColor=dotColorFinder(timepoint,geneName,'cloud')
-                cloudColors.append(dotColor)
-                expSet[geneName]=[m,r,dotColor]
-
-                # for length control
-                controlLength['withFootprint'][0].append(transcriptLength)
-                controlLength['withFootprint'][1].append(r)
-
-                # for half-live
-                if transcriptHalfLife > 1 and transcriptHalfLife < 25:
-                    controlHalfLife['withFootprint'][0].append(transcriptHalfLife)
-                    controlHalfLife['withFootprint'][1].append(r)
-
-                    # for expression vs half-life comparison
-                    if m > 0:
-                        expression2halfLife['withFootprint'][0].append(m)
-                        expression2halfLife['withFootprint'][1].append(transcriptHalfLife)
-               
-    # perform regression analysis
-    print('\t regression results:')
-    slope,intercept,r_value,p_value,std_err=scipy.stats.linregress(setx,sety)
-    print('\t\t slope',slope)
-    print('\t\t intercept',intercept)
-    print('\t\t r_value',r_value)
-    print('\t\t pvalue',p_value)
-    print('\t\t std_err',std_err)
-
-    # compute for the model
-    m=slope
-    c=intercept
-    expected=list(m*numpy.array(setx)+c)
-
-    # predicted value
-    expression2Predict=100
-    predictedRatio=m*numpy.array(numpy.log10(expression2Predict))+c
-    predictedValue=(2**predictedRatio)*expression2Predict
-    print('\t\t predicted value:',predictedValue)
-
-    # computed model
-    satx=numpy.arange(0,10000,1)
-        
-    factor=m*numpy.log10(satx+1) + c + numpy.log2(satx+1)
-    saty=(2**(factor))-1
-
-    sat.append([list(satx),list(saty)])
-        
-    # plot figure
-    for i in range(len(setx)):
-        matplotlib.pyplot.plot(setx[i],sety[i],'o',alpha=0.05,mew=0,color='black')
-    for i in range(len(hollowx)):
-        matplotlib.pyplot.plot(hollowx[i],hollowy[i],'o',alpha=0.05,mew=0,color='tan')
-    matplotlib.pyplot.plot(setx,expected,'-',lw=2,color=theColor[timepoint])
-
-    # PI analysis
-    regressionLine,CI,PI=regressionAnalysis(numpy.array(setx),numpy.array(sety))
-    matplotlib.pyplot.plot(regressionLine[0],regressionLine[1],color='black',lw=1)
-    matplotlib.pyplot.fill_between(regressionLine[0],PI[1],PI[0],color='black',alpha=0.1,lw=0)
-    for i in range(len(setNames)):
-        # find the regression point closer to ribox[i] and define the approximate limit from PI
-        distances=[abs(position-setx[i]) for position in regressionLine[0]]
-        index=distances.index(min(distances))
-        limitTop=PI[0][index]
-        limitBottom=PI[1][index]
-        # check if values are above or below PI
-        if sety[i] > limitTop:
-            devColor='red'
-            diagonalDeviations[timepoint]['up'].append(setNames[i])
-        elif sety[i] < limitBottom:
-            devColor='blue'
-            diagonalDeviations[timepoint]['down'].append(setNames[i])
-        else:
-            devColor='black'
-            diagonalDeviations[timepoint]['neutral'].append(setNames[i])
-        # plot the point
-        matplotlib.pyplot.plot(setx[i],sety[i],'.',color=devColor,mew=0,ms=4)
-        
-    matplotlib.pyplot.xlabel('mRNA [log$_{10}$ TPM+1]')
-    matplotlib.pyplot.ylabel('footprint/mRNA [log$_{2}$ ratio]')
-
-    matplotlib.pyplot.xlim([-0.1,5.3])
-    matplotlib.pyplot.ylim([-15.2,8.4])
-
-    matplotlib.pyplot.grid(True,alpha=0.5,ls=':')
-
-    matplotlib.pyplot.tight_layout()
-    matplotlib.pyplot.savefig(figureName)
-    matplotlib.pyplot.clf()
-
-    print('\t completed analysis per time point.\n')
-
-    # call function to create PLOT3, i.e., TE vs transcriptional regulation
-    if timepoint != 'tp.1':
-        transcriptionalRegulationAnalyzer()
+# 2.3. analyse time points in parallel, each in its own process and figure
+tasks=[]
+for t in range(len(timepoints)):
+    timepoint=timepoints[t]
+    cloud=TE['withFootprint'][:,t]
+    task={}
+    task['timepoint']=timepoint; task['t']=t
+    task['geneNames']=geneNames
+    task['TE']={key:value[:,t] for key,value in TE.items()}
+    task['fit']={key:value[t] for key,value in trendFits.items()}
+    task['DETs']=[DETs['up'][timepoint],DETs['down'][timepoint]] if timepoint in DETs['up'] else [None,None]
+    task['transcriptLengths']=transcriptLengthArray
+    task['halfLifes']=halfLifeArray
+    task['cloudTensors']=[expressionTensors['trna'][cloud,t,:],expressionTensors['rbf'][cloud,t,:]]
+    task['color']=theColor[timepoint]
+    task['bootstrapResamples']=bootstrapResamples; task['bootstrapSeed']=bootstrapSeed
+    task['rasterizedClouds']=rasterizedClouds
+    tasks.append(task)
+
+# workers are forked, so that they do not re-run this script as they would with the spawn start method
+if numberOfThreads > 1:
+    hydra=multiprocessing.get_context('fork').Pool(min(numberOfThreads,len(tasks)))
+    results=hydra.map(timepointAnalyzer,tasks)
+    hydra.close()
+    hydra.join()
+else:
+    results=[timepointAnalyzer(task) for task in tasks]
+
+# 2.4. merge results in time point order
+for result in results:
+    timepoint=result['timepoint']
+    sat.append(result['sat'])
+    slopeUncertainty[timepoint]=result['slopeUncertainty']
+    diagonalDeviations[timepoint]=result['diagonalDeviations']
+    if result['regulationDeviations'] is not None:
+        regulationDeviations.append(result['regulationDeviations'])
+    totalSetx.extend(result['setx']); totalSety.extend(result['sety'])
+    totalHollowx.extend(result['hollowx']); totalHollowy.extend(result['hollowy'])
+    for label in ['withFootprint','withoutFootprint']:
+        for j in range(2):
+            controlLength[label][j].extend(result['controlLength'][label][j])
+            controlHalfLife[label][j].extend(result['controlHalfLife'][label][j])
+            expression2halfLife[label][j].extend(result['expression2halfLife'][label][j])
+
+# 2.5. per-gene results of all time points as one columnar table, gene x time point
+deviationMatrix=numpy.stack([result['deviation'] for result in results],axis=1)
+teResults=resultsTableBuilder(TE,DETs,deviationMatrix,transcriptLengthArray,halfLifeArray,geneNames,timepoints)
+translationalEfficiency.resultsWriter(teResults,'TE.results',tsv=tsvResults)
+
+# rank tests of deviations between DET classes, for all time points and expression ranges
+print('rank tests of deviations from the TE model between DET classes...')
+regulationTests=regulationTester(regulationDeviations)
 
 # save information about deviations from diagonal into a text file
 with open('diagonal.deviated.names.txt','w') as f:
@@ -616,8 +522,8 @@ with open('diagonal.deviated.names.txt','w') as f:
 # build figure for all time points
 figure=matplotlib.pyplot.figure(figsize=(8,6))
 print('building figure for all time points...')
-matplotlib.pyplot.plot(totalSetx,totalSety,'o',alpha=0.0333,mew=0,color='black')
-matplotlib.pyplot.plot(totalHollowx,totalHollowy,'o',alpha=0.0333,mew=0,color='tan')
+cloudPlotter.cloudPlotter(totalSetx,totalSety,color='black',alpha=0.0333,rasterized=rasterizedClouds)
+cloudPlotter.cloudPlotter(totalHollowx,totalHollowy,color='tan',alpha=0.0333,rasterized=rasterizedClouds)
 
 print('\t regression results:')
 slope,intercept,r_value,p_value,std_err=scipy.stats.linregress(totalSetx,totalSety)
@@ -725,7 +631,7 @@ figureName='figures/TE.control.transcript.length.pdf'
 matplotlib.pyplot.figure(figsize=(8,6))
 x=controlLength['withFootprint'][0]
 y=controlLength['withFootprint'][1]
-matplotlib.pyplot.plot(x,y,'o',alpha=0.0333,mew=0,color='black')
+cloudPlotter.cloudPlotter(x,y,color='black',alpha=0.0333,rasterized=rasterizedClouds)
 slope,intercept,r_value,p_value,std_err=scipy.stats.linregress(x,y)
 print('\t\t with footprints...')
 print('\t\t\t slope',slope)
@@ -741,7 +647,7 @@ matplotlib.pyplot.plot(sequence,expected,'-',lw=2,color='black')
 # without
 x=controlLength['withoutFootprint'][0]
 y=controlLength['withoutFootprint'][1]
-matplotlib.pyplot.plot(x,y,'o',alpha=0.0333,mew=0,color='tan')
+cloudPlotter.cloudPlotter(x,y,color='tan',alpha=0.0333,rasterized=rasterizedClouds)
 slope,intercept,r_value,p_value,std_err=scipy.stats.linregress(x,y)
 print('\t\t without footprints...')
 print('\t\t\t slope',slope)
@@ -807,7 +713,7 @@ figureName='figures/TE.control.half-life.pdf'
 matplotlib.pyplot.figure(figsize=(8,6))
 x=controlHalfLife['withFootprint'][0]
 y=controlHalfLife['withFootprint'][1]
-matplotlib.pyplot.plot(x,y,'o',alpha=0.0333,mew=0,color='black')
+cloudPlotter.cloudPlotter(x,y,color='black',alpha=0.0333,rasterized=rasterizedClouds)
 slope,intercept,r_value,p_value,std_err=scipy.stats.linregress(x,y)
 print('\t\t with footprints...')
 print('\t\t\t slope',slope)
@@ -823,7 +729,7 @@ matplotlib.pyplot.plot(sequence,expected,'-',lw=2,color='black')
 # without
 x=controlHalfLife['withoutFootprint'][0]
 y=controlHalfLife['withoutFootprint'][1]
-matplotlib.pyplot.plot(x,y,'o',alpha=0.0333,mew=0,color='tan')
+cloudPlotter.cloudPlotter(x,y,color='tan',alpha=0.0333,rasterized=rasterizedClouds)
 slope,intercept,r_value,p_value,std_err=scipy.stats.linregress(x,y)
 print('\t\t without footprints...')
 print('\t\t\t slope',slope)
@@ -892,7 +798,7 @@ figure_name='figures/expression.half-life.pdf'
 matplotlib.pyplot.figure(figsize=(8,6))
 x=expression2halfLife['withoutFootprint'][0]
 y=expression2halfLife['withoutFootprint'][1]
-matplotlib.pyplot.plot(x,y,'o',alpha=0.05,mew=0,color='tan')
+cloudPlotter.cloudPlotter(x,y,color='tan',alpha=0.05,rasterized=rasterizedClouds)
 slope,intercept,r_value,p_value,std_err=scipy.stats.linregress(x,y)
 print('\t\t slope',slope)
 print('\t\t intercept',intercept)
@@ -908,7 +814,7 @@ matplotlib.pyplot.plot(sequence,expected,'-',lw=2,color='tan')
 print('\t working with transcripts with footprints...')
 x=expression2halfLife['withFootprint'][0]
 y=expression2halfLife['withFootprint'][1]
-matplotlib.pyplot.plot(x,y,'o',alpha=0.05,mew=0,color='black')
+cloudPlotter.cloudPlotter(x,y,color='black',alpha=0.05,rasterized=rasterizedClouds)
 slope,intercept,r_value,p_value,std_err=scipy.stats.linregress(x,y)
 print('\t\t slope',slope)
 print('\t\t intercept',intercept)
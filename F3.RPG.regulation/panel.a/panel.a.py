@@ -2,7 +2,9 @@
 ### this script performs analysis as Fig 1b of Schafer et al. (PMID, 26007203)
 ###
 
-import sys,numpy
+import os,sys,numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','library'))
+import deseqTables
 import matplotlib,matplotlib.pyplot
 
 matplotlib.rcParams.update({'font.size':18,'font.family':'Arial','xtick.labelsize':14,'ytick.labelsize':14})
@@ -25,16 +27,9 @@ def expressionReader():
             expressionDataFile=expressionDataDir+'significance.{}.condition_{}.csv'.format(sampleType,comparison)
             expression[comparison][sampleType]={}
 
-            with open(expressionDataFile,'r') as f:
-                next(f)
-                for line in f:
-                    vector=line.split(',')
-
-                    geneName=vector[0].replace('"','')
-                    log2FC=float(vector[2])
-
-                    if geneName in riboPtNames:
-                        expression[comparison][sampleType][geneName]=log2FC
+            table=deseqTables.significanceReader(expressionDataFile)
+            mask=deseqTables.geneMask(table,riboPtNames)
+            expression[comparison][sampleType]=dict(zip(table['gene'][mask].tolist(),table['log2FC'][mask].tolist()))
 
     return expression
 
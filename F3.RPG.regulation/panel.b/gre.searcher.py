@@ -3,6 +3,8 @@
 ###
 
 import sys,os,numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','library'))
+import annotationDatabase,genomeAccessor
 import matplotlib,matplotlib.pyplot
 import sklearn,sklearn.decomposition
 
@@ -12,82 +14,58 @@ matplotlib.rcParams['pdf.fonttype']=42
 def fastaFileReader():
 
     '''
-    This function reads the fasta file for the genome and returns a large string.
+    This function memory-maps the genome fasta file and returns an accessor to all its contigs, chromosome and plasmids.
     '''
 
-    genomeSequence=''
-
-    completed=False
-    with open(genomeFile,'r') as f:
-        next(f)
-        for line in f:
-            v=line.split()
-            if len(v) != 0:
-                genomeSequence=genomeSequence+v[0]
-            else:
-                break
+    genome=genomeAccessor.genomeReader(genomeFile)
     
-    return genomeSequence
+    return genome
 
 def upstreamSelector():
 
     '''
-    This function appends to "geneCoordinates" variable the upstream region.
+    This function returns the upstream region of "referenceGene", read 5' to 3' on its strand.
+    The region stops before the closest gene on the same contig and is at most "upstreamSearch" long.
     '''    
 
-    # f.1. find the sequence up to the next gene
-    geneHead=geneCoordinates[referenceGene][0]
-    geneTail=geneCoordinates[referenceGene][1]
-    geneStrand=geneCoordinates[referenceGene][2]
-
+    # f.1. find the sequence up to the next gene on the same contig
+    row=annotationDatabase.rowFinder(annotation,referenceGene)
+    if row is None:
+        print('gene {} not found in annotation. Exiting...'.format(referenceGene))
+        sys.exit()
+    contig=annotation['contig'][row]
+    geneHead=int(annotation['start'][row])
+    geneTail=int(annotation['end'][row])
+    geneStrand=annotation['strand'][row]
+    sameContig=annotation['contig'] == contig
        
     if geneStrand == '+': # what is the gene tail smaller than the gene head?
-        allTails=[]
-        for element in allGeneCoordinates:
-            tail=allGeneCoordinates[element][1]
-            if tail < geneHead:
-                allTails.append(tail)
-        allTails.sort()
-        curb=allTails[-1]
+        allTails=annotation['end'][sameContig & (annotation['end'] < geneHead)]
+        if len(allTails) != 0:
+            curb=int(numpy.max(allTails))
+        else:
+            curb=0
         limits=[curb,geneHead]
-        ###limits=[geneHead-100,geneHead]
                 
     elif geneStrand == '-': # what is the first 3' head?
-        allHeads=[]
-        for element in allGeneCoordinates:
-            head=allGeneCoordinates[element][0]
-            if head > geneTail:
-                allHeads.append(head)
-        allHeads.sort()
-        curb=allHeads[0]
+        allHeads=annotation['start'][sameContig & (annotation['start'] > geneTail)]
+        if len(allHeads) != 0:
+            curb=int(numpy.min(allHeads))
+        else:
+            curb=geneTail+upstreamSearch+1
         limits=[geneTail,curb]
-        ###limits=[geneTail,geneTail+100]
 
     else:
         print('error when selecting strand')
         sys.exit()
                     
-    # f.2. cut the right sequence
+    # f.2. cut the right sequence, trimmed to the nucleotides closest to the gene
     room=limits[1]-limits[0]
 
     print(limits,room)
-    
-    fullUpstream=genomeSequence[limits[0]-1:limits[1]-1]
-
-    # f.3. trim sequence
-    if geneStrand == '+':
-        if len(fullUpstream) <= upstreamSearch:
-            trimmed=fullUpstream
-        elif len(fullUpstream) > upstreamSearch:
-            trimmed=fullUpstream[len(fullUpstream)-upstreamSearch:]
-        else:
-            print('really unlucky')
-            sys.exit()
-    elif geneStrand == '-':
-        trimmed=fullUpstream[:upstreamSearch]
-    else:
-        print('error when selecting strand while trimming sequence')
-        sys.exit()
+
+    size=min(room-1,upstreamSearch)
+    trimmed=genomeAccessor.upstreamFetcher(genome,annotation['contigNames'][contig],geneHead,geneTail,geneStrand,size)
 
     return trimmed
 
@@ -95,12 +73,14 @@ def upstreamSelector():
 
 # 0. user defined variables
 regulatorySequenceSize=100
+upstreamSearch=250
 
 # 0.1. paths
 GREsDir='/Volumes/omics4tb/alomana/projects/TLR/data/GREs/positions/hal_gres/'
 groupingDataFile='/Volumes/omics4tb/alomana/projects/TLR/data/rp.transcription.groups/ribo.groupings.csv'
 riboOperonsFile='/Volumes/omics4tb/alomana/projects/TLR/data/microbesOnline/riboPtOperons.txt'
 annotationFile='/Volumes/omics4tb2/alomana/projects/TLR/data/genome/alo.build.NC002607.NC001869.NC002608.version.2020.04.19.gff3'
+genomeFile='/Volumes/omics4tb/alomana/projects/TLR/data/genome/alo.build.NC002607.NC001869.NC002608.fasta'
 positionsFile='/Volumes/omics4tb/alomana/projects/TLR/data/GREs/positions/hal_genes.tsv'
 
 # 1. read data
@@ -143,34 +123,20 @@ print('genesInOperons')
 print(genesInOperons)
 
 # 1.3. read gene orientations
-geneOrientations={}
-with open(annotationFile,'r') as f:
-    next(f)
-    next(f)
-    for line in f:
-        v=line.split('\t')
-        if 'gene' in v:
-            info=v[-1]
-
-            strand=v[6]
-            id=v[8].split('ID=')[1].split(';')[0]
-            geneOrientations[id]=strand
+annotation=annotationDatabase.annotationReader(annotationFile)
+IDs=annotation['ID'].tolist()
+geneOrientations=dict(zip(IDs,annotation['strand'].tolist()))
 
 # 1.4 convert new annotation to old annotation
 annotationMap={}; reverseAnnotationMap={}
-with open(annotationFile,'r') as f:
-    next(f)
-    next(f)
-    next(f)
-    for line in f:
-        v=line.split('\t')
-        info=v[-1]
-        if 'old_locus_tag' in info:
-            new=info.split('ID=')[1].split(';')[0]
-            old=info.split('old_locus_tag=')[1].split(';')[0].split('\n')[0].split('%')[0]
-            print(new,old) 
-            annotationMap[new]=old
-            reverseAnnotationMap[old]=new
+for row in range(len(IDs)):
+    olds=annotationDatabase.oldTagsFinder(annotation,row)
+    if len(olds) != 0:
+        new=IDs[row]
+        old=olds[0]
+        print(new,old) 
+        annotationMap[new]=old
+        reverseAnnotationMap[old]=new
 
 # 1.5. associate regulatory regions to genes in the old annotation
 regulatoryRegions={}
@@ -331,6 +297,7 @@ sys.exit()
                     
            
 # 2. define the upstream regulatory sequence for each gene, independently of being inside an operon
+genome=fastaFileReader()
 upstreamSections={}
 upstreamSections['groupA']={}
 upstreamSections['groupB']={}
@@ -343,7 +310,7 @@ for geneSetName in geneSets:
     for geneName in geneSets[geneSetName]:
 
         # define gene strand direction
-        strand=geneCoordinates[geneName][2]
+        strand=geneOrientations[geneName]
 
         # find if it belongs to an operon
         operonMembership=None
@@ -375,7 +342,7 @@ for geneSetName in geneSets:
 for geneSetName in upstreamSections:
     for reference in upstreamSections[geneSetName]:
         
-        print('>{}.{}.{}.{}'.format(geneSetName,reference,'-'.join(upstreamSections[geneSetName][reference][1]),geneCoordinates[reference][2]))
+        print('>{}.{}.{}.{}'.format(geneSetName,reference,'-'.join(upstreamSections[geneSetName][reference][1]),geneOrientations[reference]))
         print(upstreamSections[geneSetName][reference][0])
 
     print()
@@ -3,6 +3,8 @@
 ###
 
 import sys,os,numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','library'))
+import deseqTables
 import matplotlib,matplotlib.pyplot
 
 matplotlib.rcParams.update({'font.size':18,'font.family':'Arial','xtick.labelsize':14,'ytick.labelsize':14})
@@ -43,16 +45,9 @@ def expressionReaderFC():
             expressionDataFile=expressionDataDir+'significance.{}.condition_{}.csv'.format(sampleType,comparison)
             expressionFC[comparison][sampleType]={}
 
-            with open(expressionDataFile,'r') as f:
-                next(f)
-                for line in f:
-                    vector=line.split(',')
-
-                    geneName=vector[0].replace('"','')
-                    log2FC=float(vector[2])
-
-                    if geneName in riboPtNames:
-                        expressionFC[comparison][sampleType][geneName]=log2FC
+            table=deseqTables.significanceReader(expressionDataFile)
+            mask=deseqTables.geneMask(table,riboPtNames)
+            expressionFC[comparison][sampleType]=dict(zip(table['gene'][mask].tolist(),table['log2FC'][mask].tolist()))
 
     return expressionFC
 
@@ -72,48 +67,29 @@ def expressionReaderRC():
     for sampleType in sampleTypes:
         expressionDataFile=expressionDataDir+'normalizedCounts.{}.csv'.format(sampleType)
 
-        with open(expressionDataFile,'r') as f:
-
-            firstLine=f.readline()
-            header=firstLine.split(',')
-            sampleNames=header[1:]
-            sampleNames[-1]=sampleNames[-1].replace('\n','')
-
-            for line in f:
-                vector=line.split(',')
-
-                # geneName
-                geneName=vector[0]
-                if geneName in riboPtNames:
-
-                    # gene Names
-                    if geneName not in geneNames:
-                        geneNames.append(geneName)
-
-                    for i in range(len(vector)-1):
-                    
-                        # timepoint
-                        timepoint='tp.{}'.format(int(sampleNames[i].split('.')[-1]))
-                        if timepoint not in timepoints:
-                            timepoints.append(timepoint)
-
-                        # replicate
-                        replicate='rep.{}'.format(int(sampleNames[i].split('rep.')[1][0]))
-                        if replicate not in replicates:
-                            replicates.append(replicate)
-
-                        # value
-                        value=float(vector[i+1])
-
-                        # make sure keys exist
-                        if sampleType not in expressionRC.keys():
-                            expressionRC[sampleType]={}
-                        if geneName not in expressionRC[sampleType].keys():
-                            expressionRC[sampleType][geneName]={}
-                        if timepoint not in expressionRC[sampleType][geneName].keys():
-                            expressionRC[sampleType][geneName][timepoint]={}
-
-                        expressionRC[sampleType][geneName][timepoint][replicate]=value
+        table=deseqTables.countsReader(expressionDataFile)
+        mask=deseqTables.geneMask(table,riboPtNames)
+        sampleNames=table['samples'].tolist()
+
+        # timepoint and replicate of each sample
+        sampleTimepoints=[]; sampleReplicates=[]
+        for sampleName in sampleNames:
+            timepoint='tp.{}'.format(int(sampleName.split('.')[-1]))
+            if timepoint not in timepoints:
+                timepoints.append(timepoint)
+            replicate='rep.{}'.format(int(sampleName.split('rep.')[1][0]))
+            if replicate not in replicates:
+                replicates.append(replicate)
+            sampleTimepoints.append(timepoint); sampleReplicates.append(replicate)
+
+        # values of the selected genes
+        expressionRC.setdefault(sampleType,{})
+        for geneName,values in zip(table['gene'][mask].tolist(),table['counts'][mask].tolist()):
+            if geneName not in geneNames:
+                geneNames.append(geneName)
+            expressionRC[sampleType].setdefault(geneName,{})
+            for i in range(len(values)):
+                expressionRC[sampleType][geneName].setdefault(sampleTimepoints[i],{})[sampleReplicates[i]]=values[i]
 
     # sort variables
     sampleTypes.sort()
@@ -2,7 +2,9 @@
 ### this script creates a heatmap of ribosomal protein expression
 ###
 
-import sys,numpy,copy
+import os,sys,numpy,copy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','library'))
+import deseqTables
 import matplotlib,matplotlib.pyplot
 import scipy,scipy.stats
 import statsmodels,statsmodels.nonparametric,statsmodels.nonparametric.smoothers_lowess
@@ -26,48 +28,29 @@ def expressionReader():
     for sampleType in sampleTypes:
         expressionDataFile=expressionDataDir+'normalizedCounts.{}.csv'.format(sampleType)
 
-        with open(expressionDataFile,'r') as f:
-
-            firstLine=f.readline()
-            header=firstLine.split(',')
-            sampleNames=header[1:]
-            sampleNames[-1]=sampleNames[-1].replace('\n','')
-
-            for line in f:
-                vector=line.split(',')
-
-                # geneName
-                geneName=vector[0]
-                if geneName in riboPtNames:
-
-                    # gene Names
-                    if geneName not in geneNames:
-                        geneNames.append(geneName)
-
-                    for i in range(len(vector)-1):
-                    
-                        # timepoint
-                        timepoint='tp.{}'.format(int(sampleNames[i].split('.')[-1]))
-                        if timepoint not in timepoints:
-                            timepoints.append(timepoint)
-
-                        # replicate
-                        replicate='rep.{}'.format(int(sampleNames[i].split('rep.')[1][0]))
-                        if replicate not in replicates:
-                            replicates.append(replicate)
-
-                        # value
-                        value=float(vector[i+1])
-
-                        # make sure keys exist
-                        if sampleType not in expression.keys():
-                            expression[sampleType]={}
-                        if geneName not in expression[sampleType].keys():
-                            expression[sampleType][geneName]={}
-                        if timepoint not in expression[sampleType][geneName].keys():
-                            expression[sampleType][geneName][timepoint]={}
-
-                        expression[sampleType][geneName][timepoint][replicate]=value
+        table=deseqTables.countsReader(expressionDataFile)
+        mask=deseqTables.geneMask(table,riboPtNames)
+        sampleNames=table['samples'].tolist()
+
+        # timepoint and replicate of each sample
+        sampleTimepoints=[]; sampleReplicates=[]
+        for sampleName in sampleNames:
+            timepoint='tp.{}'.format(int(sampleName.split('.')[-1]))
+            if timepoint not in timepoints:
+                timepoints.append(timepoint)
+            replicate='rep.{}'.format(int(sampleName.split('rep.')[1][0]))
+            if replicate not in replicates:
+                replicates.append(replicate)
+            sampleTimepoints.append(timepoint); sampleReplicates.append(replicate)
+
+        # values of the selected genes
+        expression.setdefault(sampleType,{})
+        for geneName,values in zip(table['gene'][mask].tolist(),table['counts'][mask].tolist()):
+            if geneName not in geneNames:
+                geneNames.append(geneName)
+            expression[sampleType].setdefault(geneName,{})
+            for i in range(len(values)):
+                expression[sampleType][geneName].setdefault(sampleTimepoints[i],{})[sampleReplicates[i]]=values[i]
 
     # sort variables
     sampleTypes.sort()
@@ -3,9 +3,9 @@
 ### More info, http://markthegraph.blogspot.com/2015/05/using-python-statsmodels-for-ols-linear.html
 ###
 
-import numpy,sys
-import scipy,scipy.stats
-import statsmodels,statsmodels.api,statsmodels.sandbox,statsmodels.sandbox.regression,statsmodels.sandbox.regression.predstd
+import os,sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','library'))
+import deseqTables,regressionIntervals
 
 import matplotlib,matplotlib.pyplot
 matplotlib.rcParams.update({'font.size':18,'font.family':'Arial','xtick.labelsize':14,'ytick.labelsize':14})
@@ -24,72 +24,12 @@ def expressionReader():
         expressionDataFile=expressionDataDir+'significance.{}.condition_tp.4_vs_tp.1.csv'.format(sampleType)
         expression[sampleType]={}
 
-        with open(expressionDataFile,'r') as f:
-            next(f)
-            for line in f:
-                vector=line.split(',')
-                
-                geneName=vector[0].replace('"','')
-                log2FC=float(vector[2])
-
-                if geneName in riboPtNames:
-                    expression[sampleType][geneName]=log2FC
+        table=deseqTables.significanceReader(expressionDataFile)
+        mask=deseqTables.geneMask(table,riboPtNames)
+        expression[sampleType]=dict(zip(table['gene'][mask].tolist(),table['log2FC'][mask].tolist()))
 
     return expression
 
-def regressionAnalysis(x,y):
-
-    '''
-    This function performs regression analysis based on:
-    http://markthegraph.blogspot.com/2015/05/using-python-statsmodels-for-ols-linear.html
-    '''
-
-    # f.0 run a simple correlation analysis
-    print('\t regression results:')
-    slope,intercept,r_value,p_value,std_err=scipy.stats.linregress(x,y)
-    print('\t\t slope',slope)
-    print('\t\t intercept',intercept)
-    print('\t\t r_value',r_value)
-    print('\t\t pvalue',p_value)
-    print('\t\t std_err',std_err)
-
-    # f.1. build regression model
-    xc=statsmodels.api.add_constant(x) # constant intercept term
-    model=statsmodels.api.OLS(y,xc)
-    fitted=model.fit()
-
-    print(fitted.params)     # the estimated parameters for the regression line
-    print(fitted.summary())  # summary statistics for the regression
-
-    # f.2. interpolate model
-    a=x.min()
-    b=x.max()
-    x_pred=numpy.linspace(a,b,100)
-    x_pred2=statsmodels.api.add_constant(x_pred)
-    y_pred=fitted.predict(x_pred2)
-    regressionLine=[x_pred,y_pred]
-
-    print()
-
-    # f.3. compute CI
-    y_hat=fitted.predict(xc)
-    y_err=y-y_hat
-    mean_x=xc.T[1].mean()
-    n=len(xc)
-    dof=n-fitted.df_model-1
-    t=scipy.stats.t.ppf(1-0.025,df=dof)
-    s_err=numpy.sum(numpy.power(y_err, 2))
-    conf = t * numpy.sqrt((s_err/(n-2))*(1.0/n + (numpy.power((x_pred-mean_x),2) / ((numpy.sum(numpy.power(x_pred,2))) - n*(numpy.power(mean_x,2))))))
-    upper=y_pred+abs(conf)
-    lower=y_pred-abs(conf)
-    CI=[upper,lower]
-
-    # f.4. compute PI
-    sdevP,lowerP,upperP=statsmodels.sandbox.regression.predstd.wls_prediction_std(fitted,exog=x_pred2,alpha=0.05)
-    PI=[upperP,lowerP]
-
-    return regressionLine,CI,PI
-
 def riboPtNamesReader():
 
     '''
@@ -137,7 +77,15 @@ if len(ribox) != len(riboPtNames):
     sys.exit()
 
 # 2.2. compute regression line and intervals
-regressionLine,CI,PI=regressionAnalysis(numpy.array(ribox),numpy.array(riboy))
+fit=regressionIntervals.olsFitter(ribox,riboy)
+print('\t regression results:')
+print('\t\t slope',fit['slope'])
+print('\t\t intercept',fit['intercept'])
+print('\t\t r_value',fit['r'])
+print('\t\t pvalue',fit['p'])
+print('\t\t std_err',fit['stderr'])
+
+regressionLine,CI,PI=regressionIntervals.regressionAnalysis(ribox,riboy,fit=fit)
 
 matplotlib.pyplot.plot(regressionLine[0],regressionLine[1],color='black',lw=2)
 
@@ -145,26 +93,21 @@ matplotlib.pyplot.fill_between(regressionLine[0],CI[1],CI[0],color='black',alpha
 matplotlib.pyplot.fill_between(regressionLine[0],PI[1],PI[0],color='black',alpha=0.1,lw=0)
 
 # 3. define colors of scatter plot ribo-pt genes based on prediction intervals
+outlierLabels,limitTop,limitBottom=regressionIntervals.outlierClassifier(fit,ribox,riboy)
 for i in range(len(riboPtNames)):
 
-    # find the regression point closer to ribox[i] and define the approximate limit from PI
-    distances=[abs(position-ribox[i]) for position in regressionLine[0]]
-    index=distances.index(min(distances))
-    limitTop=PI[0][index]
-    limitBottom=PI[1][index]
-
-    # check if values are above or below PI
-    if riboy[i] > limitTop:
+    # check if values are above or below PI, evaluated at ribox[i]
+    if outlierLabels[i] == 1:
         theColor='red'; theAlpha=1
         #expected=
         print('\t {} detected as upper outlier at x={}; y={}.'.format(riboPtNames[i],ribox[i],riboy[i]))
         
-    elif riboy[i] < limitBottom:
+    elif outlierLabels[i] == -1:
         theColor='blue'; theAlpha=1
         print('\t {} detected as bottom outlier at x={}; y={}.'.format(riboPtNames[i],ribox[i],riboy[i]))
     else:
         theColor='black'; theAlpha=0.1
-        print('black\t{}\t{}\t{}\t{}'.format(riboPtNames[i],ribox[i],riboy[i],abs(riboy[i]-limitBottom)))
+        print('black\t{}\t{}\t{}\t{}'.format(riboPtNames[i],ribox[i],riboy[i],abs(riboy[i]-limitBottom[i])))
 
     # plot the point
     matplotlib.pyplot.plot(ribox[i],riboy[i],'o',alpha=theAlpha,mew=0,ms=8,color=theColor)
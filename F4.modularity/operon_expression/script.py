@@ -1,4 +1,6 @@
-import sys, operator, numpy
+import os, sys, operator, numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','library'))
+import expressionCache, fastaIndex
 import matplotlib ,matplotlib.pyplot
 matplotlib.rcParams.update({'font.size':6,'font.family':'Arial','xtick.labelsize':6,'ytick.labelsize':6})
 matplotlib.rcParams['pdf.fonttype']=42
@@ -11,23 +13,22 @@ def gene_positions_reader():
 
     gene_positions={}
 
-    with open(annotation_file,'r') as f:
-        for line in f:
-            if line[0] == '>':
-                name='gene-'+line.split('locus_tag=')[1].split(']')[0]
-                positions=line.split('location=')[1].split(']')[0].split('..')
-                clean_positions=[]
-                direction='forward'
-                for position in positions:
-                    if 'complement' in position:
-                        direction='reverse'
-                    position=position.replace('complement(','')
-                    position=position.replace(')','')
-                    position=position.replace('>','')
-                    position=position.replace('<','')
-                    position=int(position)
-                    clean_positions.append(position)
-                gene_positions[name]=[clean_positions,direction]
+    index,ids=fastaIndex.fastaIndexReader(annotation_file)
+    for id in ids:
+        name='gene-'+index[id]['attributes']['locus_tag']
+        positions=index[id]['attributes']['location'].split('..')
+        clean_positions=[]
+        direction='forward'
+        for position in positions:
+            if 'complement' in position:
+                direction='reverse'
+            position=position.replace('complement(','')
+            position=position.replace(')','')
+            position=position.replace('>','')
+            position=position.replace('<','')
+            position=int(position)
+            clean_positions.append(position)
+        gene_positions[name]=[clean_positions,direction]
 
     return gene_positions
 
@@ -174,43 +175,7 @@ def transcriptomicsReader():
     transcriptomics[trna/rbf][replicate][timepoint][gene]
     '''
 
-    data={}
-    geneNames=[]; timepoints=[]; replicates=[]
-    
-    with open(expression_file,'r') as f:
-        header=f.readline()
-        labels=header.split('\t')[1:-1]
-        for label in labels:
-            crumbles=label.split('.')
-
-            fraction=crumbles[0]
-            replicate='br'+crumbles[2]
-            timepoint='tp.'+crumbles[4]
-
-            if replicate not in replicates:
-                replicates.append(replicate)
-            if timepoint not in timepoints:
-                timepoints.append(timepoint)
-
-            if fraction not in data.keys():
-                data[fraction]={}
-            if replicate not in data[fraction].keys():
-                data[fraction][replicate]={}
-            if timepoint not in data[fraction][replicate].keys():
-                data[fraction][replicate][timepoint]={}
-            
-        for line in f:
-            vector=line.split('\t')[:-1]
-            values=[float(element) for element in vector[1:]]
-            geneName=vector[0].replace('_','')
-            if geneName not in geneNames:
-                geneNames.append(geneName)
-            for i in range(len(values)):
-                crumbles=labels[i].split('.')
-                fraction=crumbles[0]
-                replicate='br'+crumbles[2]
-                timepoint='tp.'+crumbles[4]
-                data[fraction][replicate][timepoint][geneName]=values[i]
+    data,geneNames,timepoints,replicates=expressionCache.transcriptomicsReader(expression_file)
     
     return data,geneNames,timepoints,replicates
 
@@ -2,7 +2,9 @@
 ### this script assigns most voted class to corems
 ###
 
-import sys
+import os,sys,numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','library'))
+import coremStore
 
 # 0. user defined variables
 gene2ClassFile='/Volumes/omics4tb/alomana/projects/TLR/data/annotation/si.table.1.si.ribosomal.protein.index.information.csv'
@@ -33,9 +35,7 @@ with open(gene2ClassFile,'r') as f:
             gene2Class[synonyms[name]]=theClass
 
 # 3. associate corems to class
-g=open(outputFile,'w')
-g.write('coremID,ribosomal.class\n')
-coremClasses={}
+coremIDs=[]; coremProteins=[]
 with open(coremsFile,'r') as f:
     next(f)
     for line in f:
@@ -45,12 +45,19 @@ with open(coremsFile,'r') as f:
         pro=pre.split(',')
         pru=[element.replace('"','') for element in pro]
         proteins=[element.replace(' ','') for element in pru]
+        coremIDs.append(coremID); coremProteins.append(proteins)
 
-        foundClasses=[gene2Class[element] for element in proteins]
-        democracy=max(set(foundClasses), key=foundClasses.count)
-        
-        g.write('corem.{},{}\n'.format(coremID,democracy.lower()))
+# 3.1. majority vote of all corems at once
+proteinNames=list(dict.fromkeys([element for proteins in coremProteins for element in proteins]))
+pointers,members=coremStore.csrBuilder(coremProteins,proteinNames)
+classCodes=numpy.array([acceptedClasses.index(gene2Class[element]) for element in proteinNames],dtype=numpy.int64)
+winners=coremStore.classVoter(pointers,members,classCodes,len(acceptedClasses))
 
-        print(democracy)
-        
+# 3.2. writing
+g=open(outputFile,'w')
+g.write('coremID,ribosomal.class\n')
+for i in range(len(coremIDs)):
+    democracy=acceptedClasses[winners[i]]
+    g.write('corem.{},{}\n'.format(coremIDs[i],democracy.lower()))
+    print(democracy)
 g.close()
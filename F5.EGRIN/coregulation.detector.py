@@ -2,7 +2,9 @@
 this script finds which other genes are present in the ribosomal corems that are not ribosomal genes
 """
 
-import sys
+import os,sys,numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','library'))
+import coremStore
 
 # 0. user defined data
 corems2GenesFile='/Volumes/omics4tb/alomana/projects/TLR/data/corem/hsa_c2g.txt'
@@ -33,30 +35,22 @@ with open(ribosomalCoremsFile,'r') as f:
         vector=line.split()
         ribosomalCorems.append(vector[1])
 
-# 1.3. reading all genes of corems
-allGenes=[]
-with open(corems2GenesFile,'r') as f:
-    next(f)
-    for line in f:
-        vector=line.split()
-        corem=vector[0]
-        if corem in ribosomalCorems:
-            some=vector[1].split(';')
-            print(some)
-            for element in some:
-                if element not in allGenes:
-                    allGenes.append(element)
+# 1.3. reading all genes of ribosomal corems from the corem store
+corems2Genes=coremStore.storeReader(corems2GenesFile)
+selectedCorems=numpy.flatnonzero(coremStore.nameMask(corems2Genes['corems'],ribosomalCorems))
+for position in selectedCorems:
+    print(corems2Genes['genes'][coremStore.coremMembers(corems2Genes,position)].tolist())
+coremGenes=coremStore.memberMask(corems2Genes,selectedCorems)
+allGenes=corems2Genes['genes'][coremGenes].tolist()
 
 # 2. analysis
+ribosomal=coremStore.nameMask(corems2Genes['genes'],ribosomalGenes)
 
 # 2.1. check all ribosomal genes are recapitulated
-intersect=list(set(ribosomalGenes) & set(allGenes))
+intersect=corems2Genes['genes'][coremGenes & ribosomal].tolist()
 print(len(intersect),len(ribosomalGenes))
 
 # 2.2. find the set of genes that are not ribosomal genes
-corregulated=[]
-for element in allGenes:
-    if element not in ribosomalGenes:
-        corregulated.append(element)
+corregulated=corems2Genes['genes'][coremGenes & ~ribosomal].tolist()
 
 print(corregulated,len(corregulated))
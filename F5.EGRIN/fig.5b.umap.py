@@ -1,28 +1,49 @@
-import scanpy
-scanpy.settings.verbosity=5
+import os,sys,numpy
+import matplotlib,matplotlib.pyplot
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','library'))
+import embeddings,cloudPlotter
 
-# 1. read data
-adata=scanpy.read_csv('ribo.expression.data.csv')
-print(adata)
+matplotlib.rcParams.update({'font.size':18,'font.family':'Arial','xtick.labelsize':14,'ytick.labelsize':14})
+matplotlib.rcParams['pdf.fonttype']=42
+
+def embeddingPlotter(coordinates,xlabel,ylabel,figureFile,markerSize=6,alpha=1):
+
+    '''
+    this function plots an embedding with corems colored by their cluster
+    '''
+
+    cloudPlotter.cloudPlotter(coordinates[:,0],coordinates[:,1],color=coremLabels,alpha=alpha,markerSize=markerSize)
+    matplotlib.pyplot.xlabel(xlabel)
+    matplotlib.pyplot.ylabel(ylabel)
+    matplotlib.pyplot.tight_layout()
+    matplotlib.pyplot.savefig(figureFile)
+    matplotlib.pyplot.clf()
+
+    return None
+
+# 0. user defined variables
+embeddingCacheDir='/Volumes/omics4tb/alomana/projects/TLR/data/HsaEGRIN/jars/embeddings/'
+
+# 1. read data, median expression of ribosomal corems written by pipeline.panels.A-C.py
+N=numpy.loadtxt('ribo.expression.data.csv',delimiter=',')
+print(N.shape)
 
 # 2. associate corem labels
 coremLabels=['green', 'green', 'green', 'green', 'green', 'green', 'green', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'red', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'magenta', 'blue', 'blue', 'blue', 'blue', 'blue', 'blue', 'blue', 'blue']
-adata.obs['coremLabels']=coremLabels
 
 # 2. visualization
 
 # 2.1. PCA
 print('PCA...')
-scanpy.tl.pca(adata, svd_solver='arpack')
-scanpy.pl.pca(adata,save='scanpy.pca.pdf',show=False,color='coremLabels')
+scores,explainedVar=embeddings.pcaReducer(N,cacheDir=embeddingCacheDir)
+embeddingPlotter(scores,'PCA 1 ({0:.2f} var)'.format(explainedVar[0]),'PCA 2 ({0:.2f} var)'.format(explainedVar[1]),'figures/embedding.pca.pdf')
 
 # 2.2. tSNE
 print('tSNE...')
-scanpy.tl.tsne(adata)
-scanpy.pl.tsne(adata,color='coremLabels',alpha=0.5,save='scanpy.tSNE.pdf',show=False)
+coordinates=embeddings.tsneEmbedder(N,cacheDir=embeddingCacheDir)
+embeddingPlotter(coordinates,'tSNE 1','tSNE 2','figures/embedding.tSNE.pdf',alpha=0.5)
 
 # 2.2. UMAP
 print('UMAP...')
-scanpy.pp.neighbors(adata, n_neighbors=9, n_pcs=50)
-scanpy.tl.umap(adata)
-scanpy.pl.umap(adata, color='coremLabels',save='scanpy.UMAP.pdf',show=False,palette=['blue','green','magenta','red'],size=1000,alpha=2/3)
+coordinates=embeddings.umapEmbedder(N,neighbors=9,cacheDir=embeddingCacheDir)
+embeddingPlotter(coordinates,'UMAP 1','UMAP 2','figures/embedding.UMAP.pdf',markerSize=30,alpha=2/3)
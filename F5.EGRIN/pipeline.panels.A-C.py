@@ -1,7 +1,9 @@
-import os,sys,numpy,copy,pickle
+import os,sys,numpy,copy
+import multiprocessing,multiprocessing.pool
 import matplotlib,matplotlib.pyplot,matplotlib.cm,matplotlib.patches
 import scipy,scipy.stats
-import sklearn,sklearn.decomposition,sklearn.manifold
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','library'))
+import compendiumStore,coremProfiles,coremStore,embeddings,pairwiseSimilarity,resultCache
 
 matplotlib.rcParams.update({'font.size':18,'font.family':'Arial','xtick.labelsize':14,'ytick.labelsize':14})
 matplotlib.rcParams['pdf.fonttype']=42
@@ -12,57 +14,14 @@ def backgroundComputer():
     this function computes the average Q1/median/Q3 of n random set of genes (not in corem), obtaining the same structure as analysedData
     """
 
-    background={}
-    
-    # define the genes in the corem, complementary genes
-    numberOfGenes=len(genes)
-    complementaryGenes=[element for element in allGenes if element not in genes]
-    
-    # for each block of conditions
+    # define the rows of the corem and the columns of each block of conditions
+    memberRows=[geneIndex[gene] for gene in genes]
+    blockColumns={}
     for block in sortedBlockConditions:
+        blockColumns[block]=[conditionIndex[condition] for condition in conditions if sampleMetadata[condition] == block]
 
-        background[block]={}
-        background[block]['Q1']=None
-        background[block]['median']=None
-        background[block]['Q3']=None
-
-        ensemble={}
-        ensemble['Q1']=[]
-        ensemble['median']=[]
-        ensemble['Q3']=[]
-
-        # define the conditions to operate with
-        selectedConditions=[condition for condition in conditions if sampleMetadata[condition] == block]
-
-        # define placeholders for 
-        for iteration in range(iterations):
-
-            # select a random set of complementary genes
-            geneSet=numpy.random.choice(complementaryGenes,numberOfGenes)
-
-            # defining background expression
-            white=[]
-            for gene in geneSet:
-                v=[]
-                for selectedCondition in selectedConditions:
-                    value=fullExpression[selectedCondition][gene]
-                    v.append(value)
-                white.append(v)
-            W=numpy.array(white)
-
-            # computing an instance of statistics and appending
-            q1=numpy.percentile(W,25,axis=0)
-            medians=numpy.median(W,axis=0)
-            q3=numpy.percentile(W,75,axis=0)
-
-            ensemble['Q1'].append(q1)
-            ensemble['median'].append(medians)
-            ensemble['Q3'].append(q3)
-                        
-        # computing the averages
-        background[block]['Q1']=numpy.mean(numpy.array([case for case in ensemble['Q1']]),axis=0)
-        background[block]['median']=numpy.mean(numpy.array([case for case in ensemble['median']]),axis=0)
-        background[block]['Q3']=numpy.mean(numpy.array([case for case in ensemble['Q3']]),axis=0)
+    # draw all random sets of complementary genes at once
+    background=coremProfiles.backgroundQuartiles(fullExpression,memberRows,blockColumns,iterations,seed=backgroundSeed)
 
     return background
 
@@ -179,29 +138,46 @@ def coremAverageTrends(aggregateData):
 
     return None
 
-def coremReader(inputFileName):
+def coremReader(position):
 
-    expression=[]
-    genes=[]
+    '''
+    this function recovers the expression of a selected corem from the compendium, over the genes and conditions of its table
+    '''
 
-    with open(inputFileName,'r') as f:
-        
-        header=f.readline()
-        vector=header.split('\t')
-        conditions=[element.replace('"','') for element in vector]
-        conditions[-1]=conditions[-1].replace('\n','')
+    genes=selectedCoremStore['genes'][coremStore.coremMembers(selectedCoremStore,position)]
+    conditions=selectedCoremStore['conditions'][coremStore.coremConditions(selectedCoremStore,position)]
+
+    rows=coremStore.rowMapper(genes,geneIndex)
+    columns=coremStore.rowMapper(conditions,conditionIndex)
+    if numpy.any(rows < 0) == True or numpy.any(columns < 0) == True:
+        print('corem {} has genes or conditions absent from the expression compendium. Exiting...'.format(selectedCoremStore['corems'][position]))
+        sys.exit()
+
+    Z=compendiumStore.submatrix(fullExpression,rows,columns)
+    E=numpy.array(Z,dtype=numpy.float64)
+
+    return E,conditions.tolist(),genes.tolist()
+
+def coremTableChecker(position):
+
+    '''
+    this function checks that the table of a selected corem holds the same ratios as the compendium, from which coremReader recovers them
+    '''
 
+    inputFileName='{}{}.txt'.format(dataDir,selectedCoremStore['corems'][position])
+    expression=[]
+    with open(inputFileName,'r') as f:
+        next(f)
         for line in f:
             vector=line.split()
+            expression.append([float(element) for element in vector[1:]])
 
-            geneName=vector[0].replace('"','')
-            genes.append(geneName)
-            ratios=[float(element) for element in vector[1:]]            
-            expression.append(ratios)
-            
-    E=numpy.array(expression)
+    E,conditions,genes=coremReader(position)
+    if E.shape != (len(expression),len(conditions)) or numpy.allclose(E,numpy.array(expression),rtol=1e-5,atol=1e-5,equal_nan=True) == False:
+        print('table {} does not hold the same ratios as the expression compendium. Exiting...'.format(inputFileName))
+        sys.exit()
 
-    return E,conditions,genes
+    return None
 
 def dataAnalyser(E,conditions):
 
@@ -232,29 +208,25 @@ def dataAnalyser(E,conditions):
 
     return analysedData,sortedConditions
 
-def differencesAssessment(block,theColors):
+def differencesAssessment(task):
 
     '''
-    this function checks that the size of a block is appropriate
+    this function checks that the size of a block is appropriate.
+    task is (block,theColors,positions,blockProfiles,thresholds), with the median profiles of clustered corems over the conditions of the block
     '''
 
+    block,theColors,positions,blockProfiles,thresholds=task
     print('\t{}...'.format(block))
 
-    # define working conditions
-    workingConditions=[]
-    for specific in sampleMetadata:
-        if sampleMetadata[specific] == block:
-            workingConditions.append(specific)
-
     # compute F and G
     F=numpy.ones([len(theColors),len(theColors)]) # KS-based differences
     G=numpy.ones([len(theColors),len(theColors)]) # SC-based differences
     H=numpy.ones([len(theColors),len(theColors)]) # both KS and SC
     
-    if len(workingConditions) > 50:
-        F,G,H=similarityMatrixComputer(block,theColors,workingConditions,F,G,H)
+    if blockProfiles.shape[1] > thresholds['minimumBlockSize']:
+        F,G,H=similarityMatrixComputer(block,theColors,blockProfiles,positions,thresholds,F,G,H)
                     
-    return F,G,H,len(workingConditions)
+    return F,G,H,blockProfiles.shape[1]
 
 def dimensionalityReductionAnalyses():
 
@@ -264,9 +236,6 @@ def dimensionalityReductionAnalyses():
 
     # 1. working with all corems
     theColors=[]; theAlphas=[]
-    allFiles=os.listdir(allCoremsExpressionDir)
-    coremLabels=[int(element.split('.txt')[0]) for element in allFiles if '.txt' in element]
-    coremLabels.sort()
 
     for i in range(len(coremLabels)):
     
@@ -282,18 +251,7 @@ def dimensionalityReductionAnalyses():
             theColors.append('black'); theAlphas.append(0.1)
                 
     # 1.2. define median expression over all conditions for each corem
-    M=[] # a matrix containing the medians of corems
-    for i in range(len(coremLabels)):
-        X=[]
-        for gene in coremGeneMemberships[coremLabels[i]]:
-            Y=[]
-            for condition in allConditions:
-                Y.append(fullExpression[condition][gene])
-            X.append(Y)
-        Z=numpy.array(X)
-        median=numpy.median(Z,axis=0)
-        M.append(median)
-    N=numpy.array(M)
+    N=coremMedians[[coremRowIndex[label] for label in coremLabels]] # a matrix containing the medians of corems
 
     # 1.3. PCA
     figureFile='figures/figure.pca.pdf'
@@ -325,18 +283,7 @@ def dimensionalityReductionAnalyses():
         else:
             theColors.append('black'); theAlphas.append(0.1)
             
-    M=[] # a matrix containing the medians of corems
-    for i in range(len(allRiboCorems)):
-        X=[]
-        for gene in coremGeneMemberships[allRiboCorems[i]]:
-            Y=[]
-            for condition in allConditions:
-                Y.append(fullExpression[condition][gene])
-            X.append(Y)
-        Z=numpy.array(X)
-        median=numpy.median(Z,axis=0)
-        M.append(median)
-    N=numpy.array(M)
+    N=coremMedians[[coremRowIndex[label] for label in allRiboCorems]] # a matrix containing the medians of corems
     print('Ribo matrix shape:',N.shape)
 
     # 2.1. PCA
@@ -361,30 +308,37 @@ def exhaustiveDifferencesFinder():
     '''
 
     theColors=['red','green','blue','magenta']
-    similarityJar=jarDir+'similarity.pickle'
+    similarityCacheDir=jarDir+'similarity/'
+
+    # stack the median profiles of all clustered corems, keeping the positions of each color
+    stackedCorems=[]
+    positions={}
+    for color in theColors:
+        positions[color]=numpy.arange(len(stackedCorems),len(stackedCorems)+len(clusteredCorems[color]))
+        stackedCorems=stackedCorems+clusteredCorems[color]
+    stackedProfiles=coremMedians[[coremRowIndex[corem] for corem in stackedCorems]]
+
+    # define working conditions of each block
+    blockColumns={}
+    for block in sortedBlockConditions:
+        blockColumns[block]=[conditionIndex[specific] for specific in sampleMetadata if sampleMetadata[specific] == block]
+
+    # recover similarities computed from the same inputs, or compute and store them
+    thresholds={'ks':ksThreshold,'correlation':correlationThreshold,'correlationPvalue':correlationPvalueThreshold,'minimumBlockSize':minimumBlockSize}
+    inputs=[stackedProfiles,theColors,positions,[(block,blockColumns[block]) for block in sortedBlockConditions],thresholds]
+    bundle=resultCache.cachedComputer(similarityCacheDir,inputs,similarityComputer,stackedProfiles,theColors,positions,blockColumns,thresholds)
 
-    # compute and store similarity based on KS
     similarityKS={}
     similaritySC={}
     similarityBoth={}
     conditionsSizes={}
-    for block in sortedBlockConditions:
-        # compute the matrix of differences for that particular condition
-        F,G,H,conditionSize=differencesAssessment(block,theColors)
-        if numpy.mean(F) != 1:
-            similarityKS[block]=F
-            similaritySC[block]=G
-            similarityBoth[block]=H
-            conditionsSizes[block]=conditionSize
+    for i in range(len(bundle['blocks'])):
+        block=str(bundle['blocks'][i])
+        similarityKS[block]=bundle['KS'][i]
+        similaritySC[block]=bundle['SC'][i]
+        similarityBoth[block]=bundle['both'][i]
+        conditionsSizes[block]=int(bundle['sizes'][i])
     similarities=[similarityKS,similaritySC,similarityBoth,conditionsSizes]
-    f=open(similarityJar,'wb')
-    pickle.dump(similarities,f)
-    f.close()
-    
-    # recover similarity
-    f=open(similarityJar,'rb')
-    similarities=pickle.load(f)
-    f.close()
 
     # plot a heat map with similarities
     heatmapSimilaritiesPlotter(similarities)
@@ -394,57 +348,28 @@ def exhaustiveDifferencesFinder():
 def expressionReader():
 
     '''
-    this function creates a dictionary with all expression values as expression[condition][geneName]=value
+    this function reads all expression values from the float32 store as fullExpression[geneIndex[geneName],conditionIndex[condition]]=value
     '''
 
-    fullExpression={}
-    allGenes=[]
-    
-    with open(expressionDataFile,'r') as f:
-        
-        header=f.readline()
-        vector=header.split('\t')
-        allConditions=[element.replace('"','') for element in vector]
-        allConditions[-1]=allConditions[-1].replace('\n','')
-
-        for condition in allConditions:
-            fullExpression[condition]={}
-
-        for line in f:
-            vector=line.split('\t')
-
-            geneName=vector[0].replace('"','')
-            allGenes.append(geneName)
-            ratios=[float(element) for element in vector[1:]]
-
-            for i in range(len(allConditions)):
-                fullExpression[allConditions[i]][geneName]=ratios[i]
+    fullExpression,allGenes,allConditions,geneIndex,conditionIndex=compendiumStore.compendiumReader(expressionDataFile)
 
-    return fullExpression,allGenes,allConditions
+    return fullExpression,allGenes,allConditions,geneIndex,conditionIndex
 
 def geneMembershipReader():
 
     '''
-    this function reads the gene members of selected corems
+    this function recovers the labels of all corems and the compendium rows of their gene members from the corem store
     '''
 
-    coremGeneMemberships={}
-    allFiles=os.listdir(allCoremsExpressionDir)
-    coremLabels=[int(element.split('.txt')[0]) for element in allFiles if '.txt' in element]
-    coremLabels.sort()
-        
-    for i in range(len(coremLabels)):
-        fileName='{}{}.txt'.format(allCoremsExpressionDir,coremLabels[i])
-        genes=[]
-        with open(fileName,'r') as f:
-            next(f)
-            for line in f:
-                vector=line.split('\t')
-                geneName=vector[0].replace('"','')
-                genes.append(geneName)
-        coremGeneMemberships[coremLabels[i]]=genes
+    coremLabels=[int(label) for label in allCoremStore['corems'].tolist()]
+    geneRows=coremStore.rowMapper(allCoremStore['genes'],geneIndex)
+    if numpy.any(geneRows < 0) == True:
+        print('found corem members absent from the expression compendium. Exiting...')
+        sys.exit()
+
+    coremMemberRows=[geneRows[coremStore.coremMembers(allCoremStore,i)] for i in range(len(coremLabels))]
             
-    return coremGeneMemberships
+    return coremLabels,coremMemberRows
 
 def heatmapSimilaritiesPlotter(similarities):
 
@@ -531,10 +456,8 @@ def pcaCaller(N,theColors,theAlphas,figureFile):
     '''
     
     print('running PCA...')
-    pcaMethod=sklearn.decomposition.PCA(n_components=5)
-    pcaObject=pcaMethod.fit(N)
-    new=pcaObject.transform(N)
-    explainedVar=pcaObject.explained_variance_ratio_
+    new,explainedVar=embeddings.pcaReducer(N,cacheDir=embeddingCacheDir) # the same cached PCA as for t-SNE
+    new=new[:,:5]; explainedVar=explainedVar[:5]
     print('cumsum explained variance...')
     print(numpy.cumsum(explainedVar))
 
@@ -631,101 +554,34 @@ def plotter(label,analysedData,sortedBlockConditions):
 
     return None
 
-def similarityMatrixComputer(block,theColors,workingConditions,F,G,H):
+def similarityMatrixComputer(block,theColors,blockProfiles,positions,thresholds,F,G,H):
 
     '''
-    this function computes a matrix of differences for clusters of corems for a particular condition
+    this function computes a matrix of differences for clusters of corems for a particular condition.
+    blockProfiles are the median profiles of clustered corems over the conditions of the block, positions[color] their rows
     '''
 
+    # test for the difference between all pairs of corems at once: KS and Spearman rank
+    D,pvaluesKS=pairwiseSimilarity.ksMatrix(blockProfiles)
+    correlations,pvaluesSC=pairwiseSimilarity.spearmanMatrix(blockProfiles)
+
+    differentKS=pvaluesKS <= thresholds['ks']
+    differentSC=~((correlations >= thresholds['correlation']) & (pvaluesSC <= thresholds['correlationPvalue']))
+    differentAny=differentKS | differentSC
+
     for i in range(len(theColors)):
         for j in range(len(theColors)):
             if i<=j:
                 color1=theColors[i]
                 color2=theColors[j]
-                
-                # define corems
-                coremsA=clusteredCorems[color1]
-                coremsB=clusteredCorems[color2]
+                pairs=numpy.ix_(positions[color1],positions[color2])
 
                 # define frequency of differences
-                maxRankDifferences=0
-                KSdifferences=0
-                SCdifferences=0
-                anyDifferences=0
-                
-                for coremA in coremsA:
-                    for coremB in coremsB:
-
-                        # obtain median expression for coremA
-                        X=[]
-                        genesA=coremGeneMemberships[coremA]
-                        for gene in genesA:
-                            Y=[]
-                            for condition in workingConditions:
-                                Y.append(fullExpression[condition][gene])
-                            X.append(Y)
-                        Z=numpy.array(X)
-                        medianA=numpy.median(Z,axis=0)
-
-                        # obtain median expression for coremB
-                        X=[]
-                        genesB=coremGeneMemberships[coremB]
-                        for gene in genesB:
-                            Y=[]
-                            for condition in workingConditions:
-                                Y.append(fullExpression[condition][gene])
-                            X.append(Y)
-                        Z=numpy.array(X)
-                        medianB=numpy.median(Z,axis=0)
-
-                        # test for the difference between them: KS and Spearman rank
-                        maxRankDifferences=maxRankDifferences+1
-                        diffKS=0
-                        diffSC=0
-
-                        D,pvalueKS=scipy.stats.ks_2samp(medianA,medianB)
-                        if pvalueKS <= 0.05:
-                            KSdifferences=KSdifferences+1
-                            diffKS=1
-
-                        correlation,pvalueSC=scipy.stats.spearmanr(medianA,medianB)
-                        
-                        if correlation >= 0.4 and pvalueSC <= 0.05: 
-                            pass
-                        else:
-                            SCdifferences=SCdifferences+1
-                            diffSC=1
-
-                        if diffKS == 1 or diffSC == 1:
-                            anyDifferences=anyDifferences+1
-
-
-                        '''
-                        
-                        # plotting rank figures
-                        if diffKS == 0 and diffSC == 1:
-                            figureName='figures/similarityFigures/{}.{}.{}.{}.{}.pdf'.format(block,color1,color2,coremA,coremB)
-
-                            A=numpy.vstack([medianA,numpy.ones(len(medianA))]).T
-                            m,c=numpy.linalg.lstsq(A,numpy.array(medianB))[0]
-
-                            matplotlib.pyplot.scatter(medianA,medianB,color='black')
-                            matplotlib.pyplot.plot(medianA,medianA*m+c,color='red',lw=2)
-
-                            message='D={:.2f}, p={:.3f}, diff={:d}\nSC={:.2f}, p={:.3f}, diff={:d}'.format(D,pvalueKS,diffKS,correlation,pvalueSC,diffSC)
-                            matplotlib.pyplot.text(0,1,message)
-                            
-                            print('***\t {} {}'.format(coremA,coremB))
-                            print(message)
-                            print(figureName)
-                            print('')
-
-                            matplotlib.pyplot.tight_layout()
-                            matplotlib.pyplot.savefig(figureName)
-                            matplotlib.pyplot.clf()
-                        '''
-
-                        
+                maxRankDifferences=len(positions[color1])*len(positions[color2])
+                KSdifferences=numpy.sum(differentKS[pairs])
+                SCdifferences=numpy.sum(differentSC[pairs])
+                anyDifferences=numpy.sum(differentAny[pairs])
+
                 # define similarity
                 similarityKS=1-(KSdifferences/maxRankDifferences)
                 F[i,j]=similarityKS
@@ -743,12 +599,46 @@ def similarityMatrixComputer(block,theColors,workingConditions,F,G,H):
 
     return F,G,H
 
+def similarityComputer(stackedProfiles,theColors,positions,blockColumns,thresholds):
+
+    '''
+    this function computes the matrices of differences for all blocks of conditions in parallel, each task carrying the profiles of its block.
+    it returns a bundle of arrays: blocks, KS, SC, both and sizes, for the blocks large enough to be assessed
+    '''
+
+    tasks=[(block,theColors,positions,stackedProfiles[:,blockColumns[block]],thresholds) for block in blockColumns]
+
+    # workers are forked, so that they do not re-run this script as they would with the spawn start method
+    if numberOfThreads > 1 and len(tasks) > 1:
+        hydra=multiprocessing.get_context('fork').Pool(min(numberOfThreads,len(tasks)))
+        try:
+            assessments=hydra.map(differencesAssessment,tasks)
+        finally:
+            hydra.close()
+            hydra.join()
+    else:
+        assessments=[differencesAssessment(task) for task in tasks]
+
+    # keep blocks where differences were computed
+    blocks=[]; KS=[]; SC=[]; both=[]; sizes=[]
+    for block,assessment in zip(blockColumns,assessments):
+        F,G,H,conditionSize=assessment
+        if numpy.mean(F) != 1:
+            blocks.append(block); KS.append(F); SC.append(G); both.append(H); sizes.append(conditionSize)
+
+    bundle={}
+    bundle['blocks']=numpy.array(blocks,dtype=numpy.str_)
+    bundle['KS']=numpy.array(KS).reshape(len(blocks),len(theColors),len(theColors))
+    bundle['SC']=numpy.array(SC).reshape(len(blocks),len(theColors),len(theColors))
+    bundle['both']=numpy.array(both).reshape(len(blocks),len(theColors),len(theColors))
+    bundle['sizes']=numpy.array(sizes,dtype=numpy.int64)
+
+    return bundle
+
 def tSNEcaller(N,theColors,theAlphas,figureFile,perplexityValue):
 
     print('running t-SNE...')
-    tSNE_Method=sklearn.manifold.TSNE(method='exact',verbose=1,init='pca',perplexity=perplexityValue)
-    tSNE_Object=tSNE_Method.fit(N)
-    new=tSNE_Object.fit_transform(N)
+    new=embeddings.tsneEmbedder(N,perplexity=perplexityValue,cacheDir=embeddingCacheDir)
 
     for i in range(len(new)):
         matplotlib.pyplot.scatter(new[i,0],new[i,1],c=theColors[i],alpha=theAlphas[i],s=60,lw=0)
@@ -767,7 +657,18 @@ dataDir='/Volumes/omics4tb/alomana/projects/TLR/data/HsaEGRIN/expressionSelected
 metadataFile='/Volumes/omics4tb/alomana/projects/TLR/data/HsaEGRIN/metadata/array_annot.txt'
 expressionDataFile='/Volumes/omics4tb/alomana/projects/TLR/data/HsaEGRIN/halo_egrin2_expression_ratios.txt'
 jarDir='/Volumes/omics4tb/alomana/projects/TLR/data/HsaEGRIN/jars/'
-iterations=int(1e1)
+iterations=int(1e4)
+backgroundSeed=20190101
+numberOfThreads=4
+
+# 0.1. thresholds of corem differences, similarities are cached in jarDir/similarity/ under a digest of all inputs
+ksThreshold=0.05
+correlationThreshold=0.4
+correlationPvalueThreshold=0.05
+minimumBlockSize=50
+
+# 0.2. PCA and neighbour graphs of embeddings are cached in jarDir/embeddings/
+embeddingCacheDir=jarDir+'embeddings/'
 
 clusteredCorems={}
 clusteredCorems['green']=[8655,12578,7474,7473,20960,20806,7469]
@@ -776,20 +677,29 @@ clusteredCorems['magenta']=[1842,8639,4277,4084,3418,1852,1845,1841,1837,1674,18
 clusteredCorems['blue']=[21857,3404,7316,20779,639,3280,164,31942]
 
 # 1. reading data
-# 1.1. setting expression files
-elements=os.listdir(dataDir)
-coremPaths=[element for element in elements if '.txt' in element]
-coremPaths.sort()
+# 1.1. reading corem stores, all corems and the selected ones with their conditions
+allCoremStore=coremStore.storeReader(allCoremsExpressionDir)
+selectedCoremStore=coremStore.storeReader(dataDir)
+selectedCoremIndex=compendiumStore.indexBuilder([label+'.txt' for label in selectedCoremStore['corems'].tolist()])
+coremPaths=sorted(selectedCoremIndex.keys())
 
 # 1.2. reading sample metadata
 sampleMetadata,annotationValues=metadataReader()
 
 # 1.3. reading full expression data
 print('reading expression data...')
-fullExpression,allGenes,allConditions=expressionReader()
+fullExpression,allGenes,allConditions,geneIndex,conditionIndex=expressionReader()
 
-# 1.4. reading corem gene memberships for clustered ones
-coremGeneMemberships=geneMembershipReader()
+# 1.4. reading corem gene memberships
+coremLabels,coremMemberRows=geneMembershipReader()
+
+# 1.5. computing the median profile of every corem once
+print('computing corem median profiles...')
+coremRowIndex=compendiumStore.indexBuilder(coremLabels)
+coremMedians=coremProfiles.medianProfiles(fullExpression,coremMemberRows)
+
+# 1.6. checking once that selected corem tables hold the compendium ratios
+coremTableChecker(selectedCoremIndex[coremPaths[0]])
 
 # 2. iterating over specific corems
 print('working with corems...')
@@ -797,12 +707,10 @@ aggregateData={}
 for case in coremPaths:
 
     print('\t working with corem {}...'.format(case))
-    
-    inputFileName=dataDir+case
 
     # 2.1. reading data
     print('\t reading data...')
-    E,conditions,genes=coremReader(inputFileName)
+    E,conditions,genes=coremReader(selectedCoremIndex[case])
     print('\t found {} genes.'.format(len(genes)))
     aggregateData[case]=(E,conditions)
 
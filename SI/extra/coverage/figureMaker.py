@@ -2,7 +2,9 @@
 ### This script builds histograms from the coverage profile text files.
 ###
 
-import sys,numpy
+import os,sys,numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','..','library'))
+import annotationDatabase
 import matplotlib,matplotlib.pyplot
 
 matplotlib.rcParams.update({'font.size':18,'font.family':'Arial','xtick.labelsize':14,'ytick.labelsize':14})
@@ -223,42 +225,29 @@ def geneAnnotationReader():
 
     geneAnnotations={}
 
-    with open(gffFile,'r') as f:
-        next(f)
-        next(f)
-        for line in f:
-            vector=line.split('\t')
-            if len(vector) > 3:
-                if vector[2] == 'gene': # check if gene and cds match exact position for all
-                    name=vector[8].split(';')[0].replace('ID=','')
-                    start=int(vector[3])
-                    end=int(vector[4])
-                    strand=vector[6]
-                    geneAnnotations[name]=[start,end,strand]
+    annotation=annotationDatabase.annotationReader(gffFile)
+    IDs=annotation['ID'].tolist()
+    starts=annotation['start'].tolist()
+    ends=annotation['end'].tolist()
+    strands=annotation['strand'].tolist()
+    for row in range(len(IDs)):
+        geneAnnotations[IDs[row]]=[starts[row],ends[row],strands[row]]
 
     return geneAnnotations
 
 def synonymsReader():
 
     '''
-    This function reads the GFF3 file and returns a dictionary with synonyms between old and new locus names.
+    This function reads the annotation database built from the GFF3 file and returns a dictionary with synonyms between old and new locus names.
     '''
 
     synonyms={}
-    with open(gffFile,'r') as f:
-        for line in f:
-            vector=line.split('\t')
-            if vector[0][0] != '#':
-                info=vector[-1].replace('\n','')
-                if 'old_locus_tag=' in info:
-                    old=info.split('old_locus_tag=')[1].split(';')[0]
-                    new=info.split('ID=')[1].split(';')[0]
-
-                    if '%' in old:
-                        olds=old.split('%2C')
-                        synonyms[new]=[old for old in olds]
-                    else:
-                        synonyms[new]=[old]
+    annotation=annotationDatabase.annotationReader(gffFile)
+    IDs=annotation['ID'].tolist()
+    for row in range(len(IDs)):
+        olds=annotationDatabase.oldTagsFinder(annotation,row)
+        if len(olds) != 0:
+            synonyms[IDs[row]]=olds
                 
     return synonyms
 
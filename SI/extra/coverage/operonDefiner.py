@@ -2,7 +2,9 @@
 ### This script formats ribo-pt operons from MicrobesOnline, amenable to coverage analysis.
 ###
 
-import sys
+import os,sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','..','..','library'))
+import annotationDatabase
 
 def operonPredictionsReader():
 
@@ -59,25 +61,15 @@ def riboPtNamesReader():
 def synonymsReader():
 
     '''
-    This function reads the GFF3 file and returns a dictionary with synonyms between old and new locus names.
+    This function reads the annotation database built from the GFF3 file and returns a dictionary with synonyms between old and new locus names.
     '''
 
     synonyms={}
-    with open(annotationFile,'r') as f:
-        for line in f:
-            vector=line.split('\t')
-            if vector[0][0] != '#':
-                info=vector[-1].replace('\n','')
-                if 'old_locus_tag=' in info:
-                    old=info.split('old_locus_tag=')[1].split(';')[0]
-                    new=info.split('ID=')[1].split(';')[0]
-
-                    if '%' in old:
-                        olds=old.split('%2C')
-                        for element in olds:
-                            synonyms[element]=new
-                    else:
-                        synonyms[old]=new
+    annotation=annotationDatabase.annotationReader(annotationFile)
+    IDs=annotation['ID'].tolist()
+    for row in range(len(IDs)):
+        for old in annotationDatabase.oldTagsFinder(annotation,row):
+            synonyms[old]=IDs[row]
                 
     return synonyms
 
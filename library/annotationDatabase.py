@@ -0,0 +1,135 @@
+###
+### This module parses the genome GFF3 (alo.build.NC002607.NC001869.NC002608.gff3) once into columnar arrays, one row per gene
+### (gene features and other top-level features with an old locus tag, such as pseudogenes):
+### ID, old locus tags, contig, start, end, strand, product and product source.
+### The arrays are stored next to the GFF3 and recovered on later runs. Genes can be looked up by any of their names.
+###
+
+import numpy
+import expressionCache
+
+def annotationParser(gff3File):
+
+    '''
+    This function parses the gene features of the GFF3 file, and the top-level features (no Parent) with an old locus tag such as pseudogenes,
+    and returns a dictionary of columns.
+    Old locus tags and products are taken from the gene line or, when absent there, from its child features.
+    '''
+
+    IDs=[]; contigs=[]; starts=[]; ends=[]; strands=[]
+    oldTags={}; products={}; productSources={}
+
+    with open(gff3File,'r') as f:
+        for line in f:
+            if line[0] == '#':
+                continue
+            vector=line.rstrip('\n').split('\t')
+            if len(vector) < 9:
+                continue
+            attributes=attributesParser(vector[8])
+
+            if vector[2] == 'gene' or ('Parent' not in attributes and 'ID' in attributes and 'old_locus_tag' in attributes):
+                geneID=attributes['ID']
+                IDs.append(geneID)
+                contigs.append(vector[0])
+                starts.append(int(vector[3]))
+                ends.append(int(vector[4]))
+                strands.append(vector[6])
+            else:
+                geneID=attributes.get('Parent','').split(',')[0]
+
+            if 'old_locus_tag' in attributes and geneID not in oldTags:
+                oldTags[geneID]=attributes['old_locus_tag'].split('%2C')
+            if vector[2] == 'CDS' and 'product' in attributes and geneID not in products:
+                products[geneID]=attributes['product']
+                productSources[geneID]=vector[1]
+
+    # f.2. build columns, old tags are stored as a flat array with offsets per gene
+    contigNames=list(dict.fromkeys(contigs))
+    contigIndex={contigNames[i]:i for i in range(len(contigNames))}
+
+    flatTags=[]; tagOffsets=[0]
+    for geneID in IDs:
+        flatTags.extend(oldTags.get(geneID,[]))
+        tagOffsets.append(len(flatTags))
+
+    annotation={}
+    annotation['ID']=numpy.array(IDs,dtype=numpy.str_)
+    annotation['contigNames']=numpy.array(contigNames,dtype=numpy.str_)
+    annotation['contig']=numpy.array([contigIndex[contig] for contig in contigs],dtype=numpy.int16)
+    annotation['start']=numpy.array(starts,dtype=numpy.int64)
+    annotation['end']=numpy.array(ends,dtype=numpy.int64)
+    annotation['strand']=numpy.array(strands,dtype='<U1')
+    annotation['product']=numpy.array([products.get(geneID,'') for geneID in IDs],dtype=numpy.str_)
+    annotation['productSource']=numpy.array([productSources.get(geneID,'') for geneID in IDs],dtype=numpy.str_)
+    annotation['oldTags']=numpy.array(flatTags,dtype=numpy.str_)
+    annotation['oldTagOffsets']=numpy.array(tagOffsets,dtype=numpy.int64)
+
+    return annotation
+
+def annotationReader(gff3File):
+
+    '''
+    This function returns the annotation columns of the GFF3 file, using the stored arrays when they match the file.
+    The returned dictionary also holds annotation['lookup'][name]=row for every naming scheme.
+    '''
+
+    annotation=expressionCache.bundleReader(gff3File,'.annotation.v2.npz',annotationParser)
+    annotation['lookup']=lookupBuilder(annotation)
+
+    return annotation
+
+def attributesParser(info):
+
+    '''
+    This function splits the ninth GFF3 column into a dictionary.
+    '''
+
+    attributes={}
+    for element in info.split(';'):
+        if '=' in element:
+            key,value=element.split('=',1)
+            attributes[key]=value
+
+    return attributes
+
+def lookupBuilder(annotation):
+
+    '''
+    This function maps every name of a gene to its row: the GFF3 ID (gene-VNG_RS00010), the locus tag (VNG_RS00010),
+    both without underscores (gene-VNGRS00010, VNGRS00010) and each old locus tag (VNG0001H).
+    '''
+
+    lookup={}
+    IDs=annotation['ID'].tolist()
+    oldTags=annotation['oldTags'].tolist()
+    offsets=annotation['oldTagOffsets'].tolist()
+
+    for row in range(len(IDs)):
+        geneID=IDs[row]
+        locusTag=geneID.replace('gene-','',1)
+        for name in [geneID,locusTag,geneID.replace('_',''),locusTag.replace('_','')]:
+            lookup.setdefault(name,row)
+        for old in oldTags[offsets[row]:offsets[row+1]]:
+            lookup.setdefault(old,row)
+
+    return lookup
+
+def oldTagsFinder(annotation,row):
+
+    '''
+    This function returns the list of old locus tags of a gene row.
+    '''
+
+    a=annotation['oldTagOffsets'][row]
+    b=annotation['oldTagOffsets'][row+1]
+
+    return annotation['oldTags'][a:b].tolist()
+
+def rowFinder(annotation,name):
+
+    '''
+    This function returns the row of a gene given any of its names, or None if the name is unknown.
+    '''
+
+    return annotation['lookup'].get(name)
@@ -0,0 +1,22 @@
+###
+### This module draws clouds of points as a single matplotlib collection instead of one artist per point.
+### Colours may be given per point. Collections can be rasterized, so that vector PDFs embed the cloud as an image while axes and text stay vectorial.
+###
+
+import numpy
+import matplotlib,matplotlib.pyplot
+
+def cloudPlotter(x,y,color='black',alpha=1,markerSize=6,marker='o',rasterized=False,zorder=2):
+
+    '''
+    This function draws points x,y as one collection. color is a single colour or one colour per point.
+    markerSize is the diameter in points as for matplotlib.pyplot.plot, markers are drawn without edges as with mew=0.
+    '''
+
+    x=numpy.asarray(x,dtype=numpy.float64); y=numpy.asarray(y,dtype=numpy.float64)
+    if len(x) == 0:
+        return None
+
+    collection=matplotlib.pyplot.scatter(x,y,c=color,s=markerSize**2,marker=marker,alpha=alpha,linewidths=0,rasterized=rasterized,zorder=zorder,plotnonfinite=False)
+
+    return collection
@@ -0,0 +1,101 @@
+###
+### This module stores the EGRIN2 expression ratio compendium (halo_egrin2_expression_ratios.txt) as a memory-mapped float32 matrix.
+### Rows are genes and columns are conditions. The store is kept next to the text file and is rebuilt whenever the text file changes.
+###
+
+import numpy
+import expressionCache
+
+def compendiumConverter(expressionDataFile):
+
+    '''
+    This function parses the text compendium and writes the float32 store with its gene and condition indexes.
+    '''
+
+    E,allGenes,allConditions=compendiumParser(expressionDataFile)
+    valuesFile,indexFile=storePaths(expressionDataFile)
+    stamp=expressionCache.sourceStamp(expressionDataFile)
+    expressionCache.sidecarWriter(E,allGenes,allConditions,valuesFile,indexFile,stamp)
+
+    return None
+
+def compendiumParser(expressionDataFile):
+
+    '''
+    This function parses the text compendium. The header holds only the condition names, all values are quoted.
+    '''
+
+    allGenes=[]; rows=[]
+    with open(expressionDataFile,'r') as f:
+        header=f.readline()
+        vector=header.split('\t')
+        allConditions=[element.replace('"','') for element in vector]
+        allConditions[-1]=allConditions[-1].replace('\n','')
+        for line in f:
+            vector=line.split('\t')
+            allGenes.append(vector[0].replace('"',''))
+            rows.append([float(element) for element in vector[1:]])
+    E=numpy.array(rows,dtype=numpy.float32).reshape(len(rows),len(allConditions))
+
+    return E,allGenes,allConditions
+
+def compendiumReader(expressionDataFile):
+
+    '''
+    This function returns the compendium as E[gene,condition], a read-only memory-mapped float32 array, together with
+    allGenes, allConditions, geneIndex[geneName]=row and conditionIndex[condition]=column.
+    The store is built first if it is missing or out of date.
+    '''
+
+    valuesFile,indexFile=storePaths(expressionDataFile)
+    stamp=expressionCache.sourceStamp(expressionDataFile)
+
+    stored=expressionCache.sidecarReader(valuesFile,indexFile,stamp)
+    if stored is None:
+        print('\t building float32 store for {}...'.format(expressionDataFile))
+        compendiumConverter(expressionDataFile)
+        stored=expressionCache.sidecarReader(valuesFile,indexFile,stamp)
+    E,allGenes,allConditions=stored
+
+    geneIndex=indexBuilder(allGenes)
+    conditionIndex=indexBuilder(allConditions)
+
+    return E,allGenes,allConditions,geneIndex,conditionIndex
+
+def indexBuilder(names):
+
+    '''
+    This function maps names to their positions.
+    '''
+
+    index={}
+    for i in range(len(names)):
+        index[names[i]]=i
+
+    return index
+
+def storePaths(expressionDataFile):
+
+    '''
+    This function defines the paths of the store files.
+    '''
+
+    valuesFile=expressionDataFile+'.float32.npy'
+    indexFile=expressionDataFile+'.float32.index.txt'
+
+    return valuesFile,indexFile
+
+def submatrix(E,rows,columns=None):
+
+    '''
+    This function selects genes (rows) and optionally conditions (columns) from the store.
+    Genes given as a slice with all conditions are returned as a view of the store, any other selection as a copy.
+    '''
+
+    if columns is None:
+        return E[rows]
+
+    if isinstance(rows,slice) == True:
+        return E[rows][:,columns]
+
+    return E[numpy.ix_(rows,columns)]
@@ -0,0 +1,75 @@
+###
+### This module summarizes the expression of corems over the EGRIN2 compendium (see compendiumStore) by blocks of conditions.
+### Corems are given as rows of the compendium and blocks as lists of its columns. The background of a corem is built from random sets
+### of genes outside of it: all sets are drawn at once as an index array and their quartiles are computed along the gene axis in one call.
+### Median profiles of corems are computed once over all conditions, so that comparisons in any block only select columns.
+###
+
+import numpy
+
+def backgroundQuartiles(E,memberRows,blockColumns,iterations,seed=0,chunkSize=100):
+
+    '''
+    This function computes the average Q1/median/Q3 over iterations of random sets of genes not in the corem, as many as its members and drawn with replacement.
+    memberRows are the compendium rows of the corem and blockColumns[block] the columns of each block of conditions.
+    It returns background[block][Q1/median/Q3], vectors following the order of blockColumns[block].
+    Iterations are processed in chunks of chunkSize sets so that memory does not grow with their number.
+    '''
+
+    blocks=list(blockColumns.keys())
+    columns=numpy.concatenate([numpy.asarray(blockColumns[block],dtype=numpy.int64) for block in blocks])
+    boundaries=numpy.cumsum([0]+[len(blockColumns[block]) for block in blocks])
+
+    # f.1. genes outside the corem
+    complementaryRows=numpy.setdiff1d(numpy.arange(E.shape[0]),memberRows)
+    numberOfGenes=len(memberRows)
+    generator=numpy.random.default_rng(seed)
+
+    # f.2. quartiles of all sets, chunk by chunk
+    accumulated=numpy.zeros((3,len(columns)))
+    for start in range(0,iterations,chunkSize):
+        size=min(chunkSize,iterations-start)
+        rows=complementaryRows[generator.integers(0,len(complementaryRows),size=(size,numberOfGenes))]
+        W=numpy.asarray(E[rows.ravel()][:,columns],dtype=numpy.float64).reshape(size,numberOfGenes,len(columns))
+        accumulated=accumulated+numpy.sum(quartileComputer(W),axis=0)
+    accumulated=accumulated/iterations
+
+    # f.3. split by block
+    background={}
+    for i in range(len(blocks)):
+        background[blocks[i]]={}
+        background[blocks[i]]['Q1']=accumulated[0,boundaries[i]:boundaries[i+1]]
+        background[blocks[i]]['median']=accumulated[1,boundaries[i]:boundaries[i+1]]
+        background[blocks[i]]['Q3']=accumulated[2,boundaries[i]:boundaries[i+1]]
+
+    return background
+
+def medianProfiles(E,coremRows):
+
+    '''
+    This function computes, once per corem, the median expression of its genes over every condition of the compendium.
+    coremRows are the compendium rows of each corem. It returns P[corem,condition], in the order of coremRows.
+    The profile of a corem in a block of conditions is the selection of its columns, P[:,blockColumns[block]].
+    '''
+
+    P=numpy.empty((len(coremRows),E.shape[1]),dtype=E.dtype)
+    for i in range(len(coremRows)):
+        P[i]=numpy.median(E[numpy.asarray(coremRows[i],dtype=numpy.int64)],axis=0)
+
+    return P
+
+def quartileComputer(W):
+
+    '''
+    This function returns Q1, median and Q3 over the second axis of W[set,gene,condition] as Q[set,quartile,condition],
+    with the linear interpolation of numpy.percentile, from a single sort.
+    '''
+
+    S=numpy.sort(W,axis=1)
+    positions=numpy.array([0.25,0.5,0.75])*(W.shape[1]-1)
+    low=numpy.floor(positions).astype(numpy.int64)
+    high=numpy.ceil(positions).astype(numpy.int64)
+    fraction=(positions-low)[None,:,None]
+    Q=S[:,low,:]*(1-fraction)+S[:,high,:]*fraction
+
+    return Q
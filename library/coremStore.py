@@ -0,0 +1,198 @@
+###
+### This module stores EGRIN2 corems as compressed sparse row (CSR) arrays, built once from either a directory of per-corem tables
+### (allCorems/, expressionSelectedCorems/, one <corem>.txt per corem with conditions as header and genes as first column)
+### or from a corem to genes table (hsa_c2g.txt). The store keeps memberships only, as indices into its gene and condition names:
+### corem -> genes, corem -> conditions and the transposed gene -> corems. Expression is recovered from the compendium (see compendiumStore).
+### Sets of genes are boolean masks over the genes of the store, so that unions, intersections and differences are array operations.
+### The store is cached next to its source with expressionCache.bundleReader and rebuilt whenever the source changes (for a directory, when tables are added or removed).
+###
+
+import os,numpy
+import expressionCache
+
+def c2gParser(corems2GenesFile):
+
+    '''
+    This function parses a corem to genes table, one corem per line followed by its genes separated by semicolons, into a store.
+    '''
+
+    corems=[]; memberships=[]
+    with open(corems2GenesFile,'r') as f:
+        next(f)
+        for line in f:
+            vector=line.split()
+            corems.append(vector[0])
+            memberships.append(vector[1].split(';') if len(vector) > 1 else [])
+
+    store=storeBuilder(corems,memberships,[[] for corem in corems])
+
+    return store
+
+def classVoter(pointers,indices,classCodes,numberOfClasses):
+
+    '''
+    This function assigns to every group of a CSR structure the most frequent class among its members, classCodes[member] from 0 to numberOfClasses-1.
+    Ties go to the lowest class code and groups without members receive -1.
+    '''
+
+    owners=numpy.repeat(numpy.arange(len(pointers)-1,dtype=numpy.int64),numpy.diff(pointers))
+    votes=numpy.bincount(owners*numberOfClasses+classCodes[indices],minlength=(len(pointers)-1)*numberOfClasses).reshape(len(pointers)-1,numberOfClasses)
+
+    winners=numpy.argmax(votes,axis=1)
+    winners[numpy.diff(pointers) == 0]=-1
+
+    return winners
+
+def coremConditions(store,position):
+
+    '''
+    This function returns the condition indices of the corem at position, a view of the store.
+    '''
+
+    conditions=store['coremConditions'][store['conditionPointers'][position]:store['conditionPointers'][position+1]]
+
+    return conditions
+
+def coremMembers(store,position):
+
+    '''
+    This function returns the gene indices of the corem at position, a view of the store.
+    '''
+
+    members=store['coremGenes'][store['coremPointers'][position]:store['coremPointers'][position+1]]
+
+    return members
+
+def csrBuilder(groups,names):
+
+    '''
+    This function encodes lists of names as CSR arrays over a common vocabulary. It returns pointers and indices such that
+    the names of group i are names[indices[pointers[i]:pointers[i+1]]].
+    '''
+
+    index={names[i]:i for i in range(len(names))}
+    pointers=numpy.zeros(len(groups)+1,dtype=numpy.int64)
+    pointers[1:]=numpy.cumsum([len(group) for group in groups])
+    indices=numpy.array([index[name] for group in groups for name in group],dtype=numpy.int64)
+
+    return pointers,indices
+
+def directoryParser(coremDir):
+
+    '''
+    This function parses a directory of per-corem tables into a store. Corems are named by their file names without .txt and sorted numerically.
+    Only the header (conditions) and the first column (genes) of each table are read.
+    '''
+
+    labels=[element.split('.txt')[0] for element in os.listdir(coremDir) if '.txt' in element]
+    labels.sort(key=int)
+
+    memberships=[]; conditions=[]
+    for label in labels:
+        genes=[]
+        with open(os.path.join(coremDir,label+'.txt'),'r') as f:
+            header=f.readline()
+            vector=header.split('\t')
+            names=[element.replace('"','') for element in vector]
+            names[-1]=names[-1].replace('\n','')
+            for line in f:
+                genes.append(line.split('\t',1)[0].replace('"',''))
+        memberships.append(genes); conditions.append(names)
+
+    store=storeBuilder(labels,memberships,conditions)
+
+    return store
+
+def geneCorems(store,position):
+
+    '''
+    This function returns the positions of the corems containing the gene at position, a view of the store.
+    '''
+
+    corems=store['geneCorems'][store['genePointers'][position]:store['genePointers'][position+1]]
+
+    return corems
+
+def memberMask(store,positions):
+
+    '''
+    This function returns the genes of any of the corems at positions as a boolean mask over the genes of the store.
+    Masks combine as sets: | for union, & for intersection and & ~ for difference.
+    '''
+
+    positions=numpy.asarray(positions,dtype=numpy.int64)
+    starts=store['coremPointers'][positions]
+    lengths=store['coremPointers'][positions+1]-starts
+    offsets=numpy.arange(numpy.sum(lengths))-numpy.repeat(numpy.cumsum(lengths)-lengths,lengths)
+
+    mask=numpy.zeros(len(store['genes']),dtype=bool)
+    mask[store['coremGenes'][numpy.repeat(starts,lengths)+offsets]]=True
+
+    return mask
+
+def nameMask(names,selected):
+
+    '''
+    This function returns a boolean mask over names (genes, conditions or corems of a store) of those in selected.
+    '''
+
+    mask=numpy.isin(names,numpy.array(list(selected),dtype=numpy.str_))
+
+    return mask
+
+def rowMapper(names,index):
+
+    '''
+    This function maps the gene (or condition) names of a store to rows (or columns) of the compendium with index[name]=position, -1 for absent names.
+    '''
+
+    rows=numpy.array([index.get(name,-1) for name in names.tolist()],dtype=numpy.int64)
+
+    return rows
+
+def storeBuilder(corems,memberships,conditions):
+
+    '''
+    This function builds the store arrays from corem names, their lists of genes and their lists of conditions.
+    Genes and conditions are numbered in order of first appearance. Gene to corem lists are sorted by corem position.
+    '''
+
+    genes=list(dict.fromkeys([gene for group in memberships for gene in group]))
+    allConditions=list(dict.fromkeys([condition for group in conditions for condition in group]))
+
+    coremPointers,coremGenes=csrBuilder(memberships,genes)
+    conditionPointers,coremConditionIndices=csrBuilder(conditions,allConditions)
+
+    # transpose corem -> genes into gene -> corems
+    owners=numpy.repeat(numpy.arange(len(corems),dtype=numpy.int64),numpy.diff(coremPointers))
+    order=numpy.argsort(coremGenes,kind='stable')
+    genePointers=numpy.zeros(len(genes)+1,dtype=numpy.int64)
+    genePointers[1:]=numpy.cumsum(numpy.bincount(coremGenes,minlength=len(genes)))
+
+    store={}
+    store['corems']=numpy.array(corems,dtype=numpy.str_)
+    store['genes']=numpy.array(genes,dtype=numpy.str_)
+    store['conditions']=numpy.array(allConditions,dtype=numpy.str_)
+    store['coremPointers']=coremPointers
+    store['coremGenes']=coremGenes
+    store['conditionPointers']=conditionPointers
+    store['coremConditions']=coremConditionIndices
+    store['genePointers']=genePointers
+    store['geneCorems']=owners[order]
+
+    return store
+
+def storeReader(source):
+
+    '''
+    This function returns the store of a directory of per-corem tables or of a corem to genes table, building it on first use.
+    The cache is written next to the source as <source>.corems.npz.
+    '''
+
+    source=source.rstrip(os.sep)
+    if os.path.isdir(source) == True:
+        store=expressionCache.bundleReader(source,'.corems.npz',directoryParser)
+    else:
+        store=expressionCache.bundleReader(source,'.corems.npz',c2gParser)
+
+    return store
@@ -0,0 +1,144 @@
+###
+### This module reads the DESeq2 result tables, significance.{trna,rbf}.condition_tp.N_vs_tp.1.csv and normalizedCounts.{trna,rbf}.csv,
+### into typed columns. Each table is parsed once and cached next to it as an .npz bundle. NA values become NaN.
+### Gene selections and joins across comparisons are computed on whole columns.
+###
+
+import numpy
+import expressionCache
+
+significanceColumns=['baseMean','log2FC','lfcSE','stat','pvalue','padj']
+
+def columnJoiner(tables,column,genes):
+
+    '''
+    This function aligns one column of several tables on a list of genes and returns a matrix M[table,gene].
+    Genes missing from a table are NaN.
+    '''
+
+    M=numpy.full((len(tables),len(genes)),numpy.nan)
+    for i in range(len(tables)):
+        rows=rowFinder(tables[i],genes)
+        found=rows >= 0
+        M[i,found]=tables[i][column][rows[found]]
+
+    return M
+
+def commonGenes(tables):
+
+    '''
+    This function returns the genes present in all tables, in the order of the first one.
+    '''
+
+    genes=tables[0]['gene']
+    mask=numpy.ones(len(genes),dtype=bool)
+    for table in tables[1:]:
+        mask=mask & numpy.isin(genes,table['gene'])
+
+    return genes[mask]
+
+def countsParser(dataFile):
+
+    '''
+    This function parses a normalized counts table (write.csv with quote=FALSE) into
+    table['gene'], table['samples'] and table['counts'][gene,sample].
+    '''
+
+    genes=[]; rows=[]
+    with open(dataFile,'r') as f:
+        header=f.readline().rstrip('\n').split(',')
+        samples=[element.replace('"','') for element in header[1:]]
+        for line in f:
+            vector=line.rstrip('\n').split(',')
+            genes.append(vector[0].replace('"',''))
+            rows.append([valueParser(element) for element in vector[1:]])
+
+    table={}
+    table['gene']=numpy.array(genes,dtype=numpy.str_)
+    table['samples']=numpy.array(samples,dtype=numpy.str_)
+    table['counts']=numpy.array(rows,dtype=numpy.float64).reshape(len(genes),len(samples))
+
+    return table
+
+def countsReader(dataFile):
+
+    '''
+    This function returns the cached typed columns of a normalized counts table.
+    '''
+
+    table=expressionCache.bundleReader(dataFile,'.table.npz',countsParser)
+
+    return table
+
+def geneMask(table,genes):
+
+    '''
+    This function returns a boolean mask over the rows of a table selecting the given genes.
+    '''
+
+    mask=numpy.isin(table['gene'],numpy.array(list(genes),dtype=numpy.str_))
+
+    return mask
+
+def rowFinder(table,genes):
+
+    '''
+    This function returns the row of each gene in a table, -1 for genes that are not in it.
+    '''
+
+    order=numpy.argsort(table['gene'])
+    sortedGenes=table['gene'][order]
+    query=numpy.array(list(genes),dtype=numpy.str_)
+
+    if len(sortedGenes) == 0:
+        return numpy.full(len(query),-1,dtype=numpy.int64)
+    positions=numpy.searchsorted(sortedGenes,query)
+    positions[positions == len(sortedGenes)]=0
+    rows=numpy.where(sortedGenes[positions] == query,order[positions],-1)
+
+    return rows
+
+def significanceParser(dataFile):
+
+    '''
+    This function parses a DESeq2 results table (write.csv of results()) into
+    table['gene'] and one float column per statistic: baseMean, log2FC, lfcSE, stat, pvalue and padj.
+    '''
+
+    genes=[]; rows=[]
+    with open(dataFile,'r') as f:
+        next(f)
+        for line in f:
+            vector=line.rstrip('\n').split(',')
+            genes.append(vector[0].replace('"',''))
+            rows.append([valueParser(element) for element in vector[1:7]])
+    V=numpy.array(rows,dtype=numpy.float64).reshape(len(genes),len(significanceColumns))
+
+    table={}
+    table['gene']=numpy.array(genes,dtype=numpy.str_)
+    for i in range(len(significanceColumns)):
+        table[significanceColumns[i]]=V[:,i]
+
+    return table
+
+def significanceReader(dataFile):
+
+    '''
+    This function returns the cached typed columns of a DESeq2 results table.
+    '''
+
+    table=expressionCache.bundleReader(dataFile,'.table.npz',significanceParser)
+
+    return table
+
+def valueParser(element):
+
+    '''
+    This function converts a field into a float, with NA as NaN.
+    '''
+
+    element=element.replace('"','')
+    if element == 'NA' or element == '':
+        return numpy.nan
+
+    return float(element)
@@ -0,0 +1,78 @@
+###
+### This module calls differentially expressed transcripts (DETs) from sleuth results (sleuthResultsRNA.*.csv).
+### The sleuth table is read once into arrays and cached next to it. Its transcripts are joined to the rows of the expression matrix by a gene index,
+### and the fold-change and expression filters are applied to whole arrays. DET sets are returned as boolean masks over the genes of the matrix.
+###
+
+import numpy
+import expressionCache
+
+def foldChangeFilter(meanA,meanB,pseudocount=0,foldThreshold=1,expressionThreshold=10):
+
+    '''
+    This function computes log2 fold changes of meanA over meanB, arrays of the same shape, and returns log2FC together with
+    up and down masks for changes above foldThreshold in absolute value with maximum expression above expressionThreshold.
+    '''
+
+    with numpy.errstate(divide='ignore',invalid='ignore'):
+        log2FC=numpy.log2((meanA+pseudocount)/(meanB+pseudocount))
+    passed=(numpy.abs(log2FC) > foldThreshold) & (numpy.maximum(meanA,meanB) > expressionThreshold)
+
+    up=passed & (log2FC > 0)
+    down=passed & (log2FC < 0)
+
+    return log2FC,up,down
+
+def sleuthParser(resultsFile):
+
+    '''
+    This function parses a sleuth results table written by write.table into table['target'] (transcript IDs) and table['qval'].
+    '''
+
+    targets=[]; values=[]
+    with open(resultsFile,'r') as f:
+        next(f)
+        for line in f:
+            v=line.split(',')
+            targets.append(v[1].replace('"',''))
+            values.append(float(v[3]) if v[3] != 'NA' else numpy.nan)
+
+    table={}
+    table['target']=numpy.array(targets,dtype=numpy.str_)
+    table['qval']=numpy.array(values,dtype=numpy.float64)
+
+    return table
+
+def sleuthReader(resultsFile):
+
+    '''
+    This function returns the cached arrays of a sleuth results table.
+    '''
+
+    table=expressionCache.bundleReader(resultsFile,'.sleuth.npz',sleuthParser)
+
+    return table
+
+def testedRows(table,synonyms,geneIndex):
+
+    '''
+    This function joins the transcripts of a sleuth table to the expression matrix. Transcript IDs are translated with synonyms[target]=gene name
+    and located with geneIndex[gene name]=row. It returns the rows, in table order, and a mask over the table of the transcripts found.
+    '''
+
+    rows=numpy.array([geneIndex.get(synonyms.get(target),-1) for target in table['target'].tolist()],dtype=numpy.int64)
+    found=rows >= 0
+
+    return rows,found
+
+def testedMask(table,synonyms,geneIndex):
+
+    '''
+    This function returns a boolean mask over the rows of the expression matrix of the genes present in a sleuth table.
+    '''
+
+    rows,found=testedRows(table,synonyms,geneIndex)
+    mask=numpy.zeros(len(geneIndex),dtype=bool)
+    mask[rows[found]]=True
+
+    return mask
@@ -0,0 +1,141 @@
+###
+### This module embeds the rows of a matrix (corems, genes or samples) in two dimensions by PCA, t-SNE or UMAP.
+### Rows are first reduced by PCA. A k-nearest-neighbour graph is then built on the PCA scores and is the only input of t-SNE (Barnes-Hut)
+### and UMAP, so that neither computes all pairwise distances. PCA scores and neighbour graphs are cached with resultCache under a digest
+### of their inputs. Neighbours are stored sorted by distance up to maximumNeighbors, so that changing the perplexity or the number
+### of neighbours reuses both the PCA and the graph.
+###
+
+import numpy
+import scipy,scipy.sparse
+import sklearn,sklearn.decomposition,sklearn.manifold,sklearn.neighbors
+import resultCache
+
+def cacheCaller(cacheDir,inputs,computer,*arguments):
+
+    '''
+    This function returns computer(*arguments) through the result cache, or computes it directly if cacheDir is None.
+    '''
+
+    if cacheDir is None:
+        return computer(*arguments)
+
+    bundle=resultCache.cachedComputer(cacheDir,inputs,computer,*arguments)
+
+    return bundle
+
+def neighborComputer(scores,maximumNeighbors):
+
+    '''
+    This function computes the nearest neighbours of every row of scores, itself excluded, sorted by increasing distance.
+    '''
+
+    k=min(maximumNeighbors,len(scores)-1)
+    method=sklearn.neighbors.NearestNeighbors(n_neighbors=k+1)
+    distances,indices=method.fit(scores).kneighbors(scores)
+
+    # remove each row from its own list, wherever ties placed it
+    itself=indices == numpy.arange(len(scores))[:,None]
+    itself[numpy.sum(itself,axis=1) == 0,-1]=True
+    keep=~itself
+
+    bundle={}
+    bundle['indices']=indices[keep].reshape(len(scores),k)
+    bundle['distances']=distances[keep].reshape(len(scores),k)
+
+    return bundle
+
+def neighborGraph(scores,neighbors,maximumNeighbors=150,cacheDir=None):
+
+    '''
+    This function returns the indices and distances of the neighbors nearest rows of each row of scores, as matrices [row,neighbour].
+    The graph is computed, and cached, for maximumNeighbors neighbours, of which the first ones are returned.
+    '''
+
+    scores=numpy.ascontiguousarray(scores,dtype=numpy.float64)
+    maximumNeighbors=max(maximumNeighbors,neighbors)
+    bundle=cacheCaller(cacheDir,['neighbors',scores,maximumNeighbors],neighborComputer,scores,maximumNeighbors)
+
+    k=min(neighbors,len(scores)-1)
+    indices=numpy.array(bundle['indices'][:,:k])
+    distances=numpy.array(bundle['distances'][:,:k])
+
+    return indices,distances
+
+def pcaComputer(X,components):
+
+    '''
+    This function computes PCA scores and explained variance ratios.
+    '''
+
+    method=sklearn.decomposition.PCA(n_components=components,random_state=0)
+    scores=method.fit_transform(X)
+
+    bundle={}
+    bundle['scores']=scores
+    bundle['explained']=method.explained_variance_ratio_
+
+    return bundle
+
+def pcaReducer(X,components=50,cacheDir=None):
+
+    '''
+    This function returns the scores of the rows of X on their first principal components, at most as many as rows or columns, and the explained variance ratios.
+    '''
+
+    X=numpy.ascontiguousarray(X,dtype=numpy.float64)
+    components=min(components,X.shape[0],X.shape[1])
+    bundle=cacheCaller(cacheDir,['pca',X,components],pcaComputer,X,components)
+
+    scores=numpy.array(bundle['scores'])
+    explained=numpy.array(bundle['explained'])
+
+    return scores,explained
+
+def tsneEmbedder(X,perplexity=30,components=50,maximumNeighbors=150,seed=0,cacheDir=None):
+
+    '''
+    This function embeds the rows of X with Barnes-Hut t-SNE on a neighbour graph of their PCA scores, with 3*perplexity neighbours as in exact t-SNE.
+    The initial layout is the first two principal components. It returns the coordinates [row,2].
+    '''
+
+    scores,explained=pcaReducer(X,components=components,cacheDir=cacheDir)
+    perplexity=min(perplexity,len(scores)-1)
+    neighbors=min(len(scores)-1,int(3.*perplexity+1))
+    indices,distances=neighborGraph(scores,neighbors,maximumNeighbors=maximumNeighbors,cacheDir=cacheDir)
+
+    # each row is stored as its own neighbour at distance zero, as sklearn expects of precomputed graphs.
+    # distances are squared, as sklearn does for euclidean neighbours but not for precomputed ones, and rows are sorted by distance
+    indices=numpy.hstack([numpy.arange(len(scores))[:,None],indices])
+    distances=numpy.hstack([numpy.zeros((len(scores),1)),distances])
+    rows=numpy.repeat(numpy.arange(len(scores)),indices.shape[1])
+    graph=scipy.sparse.csr_matrix((distances.ravel()**2,(rows,indices.ravel())),shape=(len(scores),len(scores)))
+    graph=sklearn.neighbors.sort_graph_by_row_values(graph,warn_when_not_sorted=False)
+
+    initial=scores[:,:2]/numpy.std(scores[:,0])*1e-4
+    method=sklearn.manifold.TSNE(perplexity=perplexity,metric='precomputed',init=initial,method='barnes_hut',random_state=seed)
+    coordinates=method.fit_transform(graph)
+
+    return coordinates
+
+def umapEmbedder(X,neighbors=15,components=50,maximumNeighbors=150,seed=0,cacheDir=None):
+
+    '''
+    This function embeds the rows of X with UMAP on the neighbour graph of their PCA scores. It returns the coordinates [row,2].
+    umap-learn is only needed for this embedding.
+    '''
+
+    import umap
+
+    scores,explained=pcaReducer(X,components=components,cacheDir=cacheDir)
+    neighbors=min(neighbors,len(scores)-1)
+    indices,distances=neighborGraph(scores,neighbors,maximumNeighbors=maximumNeighbors,cacheDir=cacheDir)
+
+    # umap expects each row to be its own first neighbour
+    indices=numpy.hstack([numpy.arange(len(scores))[:,None],indices[:,:neighbors-1]])
+    distances=numpy.hstack([numpy.zeros((len(scores),1)),distances[:,:neighbors-1]])
+
+    method=umap.UMAP(n_neighbors=neighbors,precomputed_knn=(indices,distances,None),random_state=seed)
+    coordinates=method.fit_transform(scores)
+
+    return coordinates
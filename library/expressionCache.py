@@ -0,0 +1,188 @@
+###
+### This module reads the kallisto expression matrix (expressionMatrix.kallisto.txt) and keeps a binary sidecar next to it.
+### The sidecar is keyed by the size and modification time of the text file, so that it is rebuilt whenever the matrix changes.
+### Later reads memory-map the sidecar instead of parsing the text file again.
+### The same stamp is used by bundleReader to cache any parsed table as a bundle of arrays.
+###
+
+import os,numpy
+
+def bundleReader(sourceFile,suffix,parser):
+
+    '''
+    This function returns the dictionary of arrays produced by parser(sourceFile), stored as sourceFile+suffix (an .npz bundle).
+    The bundle is reused while the stamp of the source file is unchanged. Arrays must not be of object type.
+    '''
+
+    bundleFile=sourceFile+suffix
+    stamp=sourceStamp(sourceFile)
+
+    if os.path.exists(bundleFile) == True:
+        with numpy.load(bundleFile,allow_pickle=False) as stored:
+            if 'stamp' in stored.files and str(stored['stamp']) == stamp:
+                return {key:stored[key] for key in stored.files if key != 'stamp'}
+
+    bundle=parser(sourceFile)
+    try:
+        temporaryFile=bundleFile+'.{}.tmp.npz'.format(os.getpid())
+        numpy.savez(temporaryFile,stamp=numpy.array(stamp),**bundle)
+        os.replace(temporaryFile,bundleFile)
+    except OSError as error:
+        print('\t could not write cache for {} ({}), continuing without it.'.format(sourceFile,error))
+
+    return bundle
+
+def cachedMatrixReader(matrixFile):
+
+    '''
+    This function returns the expression matrix as a read-only memory-mapped array together with its labels, as
+    E[gene,label], geneNames, labels
+    Gene names and labels are returned exactly as they appear in the text file.
+    '''
+
+    valuesFile,indexFile=sidecarPaths(matrixFile)
+    stamp=sourceStamp(matrixFile)
+
+    # f.1. try to recover the sidecar
+    cached=sidecarReader(valuesFile,indexFile,stamp)
+    if cached is not None:
+        return cached
+
+    # f.2. parse the text file and store the sidecar
+    E,geneNames,labels=matrixParser(matrixFile)
+    try:
+        sidecarWriter(E,geneNames,labels,valuesFile,indexFile,stamp)
+    except OSError as error:
+        print('\t could not write expression cache ({}), continuing without it.'.format(error))
+        return E,geneNames,labels
+
+    return sidecarReader(valuesFile,indexFile,stamp)
+
+def labelParser(label):
+
+    '''
+    This function splits a matrix label such as trna.rep.1.tp.1 into fraction, replicate and timepoint.
+    '''
+
+    crumbles=label.split('.')
+    fraction=crumbles[0]
+    replicate='br'+crumbles[2]
+    timepoint='tp.'+crumbles[4]
+
+    return fraction,replicate,timepoint
+
+def matrixParser(matrixFile):
+
+    '''
+    This function parses the text matrix. The trailing field of each line is ignored, as in the original readers.
+    '''
+
+    geneNames=[]; rows=[]
+    with open(matrixFile,'r') as f:
+        header=f.readline()
+        labels=header.split('\t')[1:-1]
+        for line in f:
+            vector=line.split('\t')[:-1]
+            geneNames.append(vector[0])
+            rows.append([float(element) for element in vector[1:]])
+    E=numpy.array(rows,dtype=numpy.float64).reshape(len(rows),len(labels))
+
+    return E,geneNames,labels
+
+def sidecarPaths(matrixFile):
+
+    '''
+    This function defines the paths of the sidecar files.
+    '''
+
+    valuesFile=matrixFile+'.values.npy'
+    indexFile=matrixFile+'.index.txt'
+
+    return valuesFile,indexFile
+
+def sidecarReader(valuesFile,indexFile,stamp):
+
+    '''
+    This function memory-maps the sidecar if it exists and matches the stamp of the text file. Otherwise it returns None.
+    '''
+
+    if os.path.exists(valuesFile) == False or os.path.exists(indexFile) == False:
+        return None
+
+    with open(indexFile,'r') as f:
+        storedStamp=f.readline().rstrip('\n')
+        labels=f.readline().rstrip('\n').split('\t')
+        geneNames=f.read().split('\n')[:-1]
+    if storedStamp != stamp:
+        return None
+
+    E=numpy.load(valuesFile,mmap_mode='r')
+    if E.shape != (len(geneNames),len(labels)):
+        return None
+
+    return E,geneNames,labels
+
+def sidecarWriter(E,geneNames,labels,valuesFile,indexFile,stamp):
+
+    '''
+    This function writes the sidecar. Files are written under temporary names and moved into place, with the index last.
+    '''
+
+    temporaryValuesFile=valuesFile+'.{}.tmp'.format(os.getpid())
+    temporaryIndexFile=indexFile+'.{}.tmp'.format(os.getpid())
+
+    with open(temporaryValuesFile,'wb') as f:
+        numpy.save(f,E)
+    with open(temporaryIndexFile,'w') as f:
+        f.write(stamp+'\n')
+        f.write('\t'.join(labels)+'\n')
+        for geneName in geneNames:
+            f.write(geneName+'\n')
+
+    os.replace(temporaryValuesFile,valuesFile)
+    os.replace(temporaryIndexFile,indexFile)
+
+    return None
+
+def sourceStamp(matrixFile):
+
+    '''
+    This function defines the stamp of the text file as its size and modification time.
+    '''
+
+    information=os.stat(matrixFile)
+    stamp='{}\t{}'.format(information.st_size,information.st_mtime_ns)
+
+    return stamp
+
+def transcriptomicsReader(matrixFile):
+
+    '''
+    This function reads transcriptomics data as in
+    transcriptomics[trna/rbf][replicate][timepoint][gene]
+    using the cached matrix. Underscores are removed from gene names.
+    '''
+
+    E,rawGeneNames,labels=cachedMatrixReader(matrixFile)
+
+    data={}
+    timepoints=[]; replicates=[]
+    geneNames=[element.replace('_','') for element in rawGeneNames]
+
+    columns=[]
+    for label in labels:
+        fraction,replicate,timepoint=labelParser(label)
+        if replicate not in replicates:
+            replicates.append(replicate)
+        if timepoint not in timepoints:
+            timepoints.append(timepoint)
+        data.setdefault(fraction,{}).setdefault(replicate,{}).setdefault(timepoint,{})
+        columns.append(data[fraction][replicate][timepoint])
+
+    for i in range(len(labels)):
+        columns[i].update(zip(geneNames,E[:,i].tolist()))
+
+    # keep the order of first appearance, as the original readers did
+    geneNames=list(dict.fromkeys(geneNames))
+
+    return data,geneNames,timepoints,replicates
@@ -0,0 +1,122 @@
+###
+### This module builds an index of a FASTA file and stores it next to it (<fasta>.index.txt).
+### For each record the index keeps the byte offset of its sequence, its length, its line layout and the [key=value] attributes of its header.
+### Lengths, synonyms and sequences are then obtained from the index without streaming the whole file.
+###
+
+import os,re
+import expressionCache
+
+attributePattern=re.compile(r'\[([^=\]]+)=([^\]]*)\]')
+
+def fastaIndexBuilder(fastaFile):
+
+    '''
+    This function scans the FASTA file once and returns index[name]=record and the names in file order.
+    A record holds offset, end (byte positions of the sequence block), length, lineBases, lineWidth and attributes.
+    lineBases is 0 when the lines of a record are not of uniform width.
+    '''
+
+    index={}; names=[]
+    record=None; lineLengths=[]
+
+    position=0
+    with open(fastaFile,'rb') as f:
+        for line in f:
+            if line[:1] == b'>':
+                if record is not None:
+                    recordCloser(record,lineLengths,position)
+                header=line.decode().rstrip('\r\n')
+                name=header[1:].split(' ')[0]
+                record={'offset':position+len(line),'attributes':dict(attributePattern.findall(header))}
+                index[name]=record; names.append(name)
+                lineLengths=[]
+            elif record is not None:
+                bases=len(line.rstrip(b'\r\n'))
+                if bases != 0:
+                    lineLengths.append((bases,len(line)))
+            position=position+len(line)
+    if record is not None:
+        recordCloser(record,lineLengths,position)
+
+    return index,names
+
+def fastaIndexReader(fastaFile):
+
+    '''
+    This function returns index[name]=record and the names in file order, building and storing the index when it is missing or out of date.
+    '''
+
+    indexFile=fastaFile+'.index.txt'
+    stamp=expressionCache.sourceStamp(fastaFile)
+
+    if os.path.exists(indexFile) == True:
+        with open(indexFile,'r') as f:
+            storedStamp=f.readline().rstrip('\n')
+            if storedStamp == stamp:
+                index={}; names=[]
+                for line in f:
+                    vector=line.rstrip('\n').split('\t')
+                    record={}
+                    record['offset'],record['end'],record['length'],record['lineBases'],record['lineWidth']=[int(element) for element in vector[1:6]]
+                    record['attributes']=dict(element.split('=',1) for element in vector[6:])
+                    index[vector[0]]=record; names.append(vector[0])
+                return index,names
+
+    index,names=fastaIndexBuilder(fastaFile)
+    try:
+        temporaryFile=indexFile+'.{}.tmp'.format(os.getpid())
+        with open(temporaryFile,'w') as f:
+            f.write(stamp+'\n')
+            for name in names:
+                record=index[name]
+                fields=[name]+[str(record[key]) for key in ['offset','end','length','lineBases','lineWidth']]
+                fields=fields+['{}={}'.format(key,value) for key,value in record['attributes'].items()]
+                f.write('\t'.join(fields)+'\n')
+        os.replace(temporaryFile,indexFile)
+    except OSError as error:
+        print('\t could not store FASTA index ({}), continuing without it.'.format(error))
+
+    return index,names
+
+def recordCloser(record,lineLengths,end):
+
+    '''
+    This function completes a record once its last sequence line has been read.
+    '''
+
+    record['end']=end
+    record['length']=sum(bases for bases,width in lineLengths)
+    uniform=all(element == lineLengths[0] for element in lineLengths[:-1])
+    if len(lineLengths) != 0 and uniform == True and lineLengths[-1][0] <= lineLengths[0][0]:
+        record['lineBases'],record['lineWidth']=lineLengths[0]
+    else:
+        record['lineBases'],record['lineWidth']=0,0
+
+    return None
+
+def sequenceFetcher(fastaFile,index,name,start=0,end=None):
+
+    '''
+    This function retrieves the sequence of a record between 0-based positions start and end (end excluded).
+    '''
+
+    record=index[name]
+    if end is None or end > record['length']:
+        end=record['length']
+    if start >= end:
+        return ''
+
+    with open(fastaFile,'rb') as f:
+        if record['lineBases'] != 0:
+            a=record['offset']+(start//record['lineBases'])*record['lineWidth']+start%record['lineBases']
+            b=record['offset']+((end-1)//record['lineBases'])*record['lineWidth']+(end-1)%record['lineBases']+1
+            f.seek(a)
+            block=f.read(b-a)
+            sequence=block.replace(b'\n',b'').replace(b'\r',b'').decode()
+        else:
+            f.seek(record['offset'])
+            block=f.read(record['end']-record['offset'])
+            sequence=b''.join(block.split()).decode()[start:end]
+
+    return sequence
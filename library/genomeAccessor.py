@@ -0,0 +1,69 @@
+###
+### This module gives access to a multi-contig genome FASTA (chromosome NC_002607 and plasmids NC_001869 and NC_002608) without loading it.
+### The file is memory-mapped and every contig is located through the FASTA index. Only the requested regions are copied.
+###
+
+import sys,mmap
+import fastaIndex
+
+complementTable=bytes.maketrans(b'ACGTUNRYKMSWBDHVacgtunrykmswbdhv',b'TGCAANYRMKSWVHDBtgcaanyrmkswvhdb')
+
+def genomeReader(genomeFile):
+
+    '''
+    This function memory-maps the genome FASTA and returns genome['map'], genome['index'] and genome['contigs'] (contig names in file order).
+    '''
+
+    index,contigs=fastaIndex.fastaIndexReader(genomeFile)
+    with open(genomeFile,'rb') as f:
+        genomeMap=mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+
+    genome={}
+    genome['map']=genomeMap
+    genome['index']=index
+    genome['contigs']=contigs
+
+    return genome
+
+def regionFetcher(genome,contig,start,end,strand='+'):
+
+    '''
+    This function returns the sequence of a contig between 1-based positions start and end, both included, clipped to the contig.
+    Regions on the - strand are returned reverse-complemented, so that they always read 5' to 3'.
+    '''
+
+    record=genome['index'][contig]
+    start=max(start,1)
+    end=min(end,record['length'])
+    if start > end:
+        return ''
+
+    a=start-1; b=end
+    if record['lineBases'] != 0:
+        first=record['offset']+(a//record['lineBases'])*record['lineWidth']+a%record['lineBases']
+        last=record['offset']+((b-1)//record['lineBases'])*record['lineWidth']+(b-1)%record['lineBases']+1
+        block=genome['map'][first:last].replace(b'\n',b'').replace(b'\r',b'')
+    else:
+        block=b''.join(genome['map'][record['offset']:record['end']].split())[a:b]
+
+    if strand == '-':
+        block=block.translate(complementTable)[::-1]
+    elif strand != '+':
+        print('error when selecting strand {}'.format(strand))
+        sys.exit()
+
+    return block.decode()
+
+def upstreamFetcher(genome,contig,start,end,strand,size):
+
+    '''
+    This function returns up to size nucleotides immediately upstream of a feature spanning start..end (1-based, both included),
+    read 5' to 3' on the strand of the feature.
+    '''
+
+    if strand == '+':
+        sequence=regionFetcher(genome,contig,start-size,start-1,'+')
+    else:
+        sequence=regionFetcher(genome,contig,end+1,end+size,'-')
+
+    return sequence
@@ -0,0 +1,109 @@
+###
+### This module computes statistics over groups of observations with array group-by operations.
+### Observations are labelled by a group (for instance time point and expression bin) and a class (for instance DET+, noDET, DET-).
+### All pairwise Mann-Whitney U tests between classes, for every group, are computed in a single batched ranking.
+###
+
+import numpy
+import scipy,scipy.stats
+
+def groupCoder(*keys):
+
+    '''
+    This function combines one or more key arrays of the same length into integer group codes.
+    It returns the codes and the list of distinct key tuples, sorted, so that groups[codes[i]] are the keys of observation i.
+    '''
+
+    inverses=[]; uniques=[]
+    for key in keys:
+        unique,inverse=numpy.unique(numpy.asarray(key),return_inverse=True)
+        uniques.append(unique.tolist()); inverses.append(inverse.ravel())
+
+    combined,codes=numpy.unique(numpy.stack(inverses,axis=1),axis=0,return_inverse=True)
+    groups=[tuple(uniques[j][combined[i,j]] for j in range(len(keys))) for i in range(len(combined))]
+
+    return codes.ravel(),groups
+
+def mannWhitneyBatch(values,tests,first,numberOfTests=None):
+
+    '''
+    This function computes two-sided Mann-Whitney U tests for many tests at once, with the normal approximation,
+    tie correction and continuity correction of scipy.stats.mannwhitneyu.
+    values are the observations of all tests concatenated, tests the test code of each observation (0 to number of tests-1)
+    and first a mask of the observations in the first sample of their test. numberOfTests defaults to the largest test code plus one.
+    It returns U of the first sample, p-values and the sizes of both samples, as vectors over tests.
+    '''
+
+    values=numpy.asarray(values,dtype=numpy.float64); tests=numpy.asarray(tests,dtype=numpy.int64); first=numpy.asarray(first,dtype=bool)
+    if numberOfTests is None:
+        numberOfTests=int(tests.max())+1 if len(tests) != 0 else 0
+
+    # f.1. average ranks within each test
+    order=numpy.lexsort((values,tests))
+    v=values[order]; g=tests[order]
+    sizes=numpy.bincount(g,minlength=numberOfTests)
+    starts=numpy.concatenate([[0],numpy.cumsum(sizes)[:-1]])
+    positions=numpy.arange(len(v))-starts[g]
+
+    newRun=numpy.ones(len(v),dtype=bool)
+    newRun[1:]=(v[1:] != v[:-1]) | (g[1:] != g[:-1])
+    runs=numpy.cumsum(newRun)-1
+    runFirst=positions[newRun]
+    runLength=numpy.bincount(runs)
+    runRank=runFirst+(runLength+1)/2
+    ranks=numpy.empty(len(v)); ranks[order]=runRank[runs]
+
+    # f.2. U statistics and normal approximation
+    n1=numpy.bincount(tests,weights=first,minlength=numberOfTests)
+    n=sizes.astype(numpy.float64); n2=n-n1
+    R1=numpy.bincount(tests,weights=ranks*first,minlength=numberOfTests)
+    U1=R1-n1*(n1+1)/2
+    U=numpy.maximum(U1,n1*n2-U1)
+
+    runTests=g[newRun]
+    tieTerm=numpy.bincount(runTests,weights=runLength**3-runLength,minlength=numberOfTests)
+    with numpy.errstate(divide='ignore',invalid='ignore'):
+        s=numpy.sqrt(n1*n2/12*((n+1)-tieTerm/(n*(n-1))))
+        z=(U-n1*n2/2-0.5)/s
+    pvalues=numpy.clip(2*scipy.stats.norm.sf(z),0,1)
+
+    return U1,pvalues,n1.astype(numpy.int64),n2.astype(numpy.int64)
+
+def pairwiseRankTests(values,groupCodes,classes,comparisons,minimumSize=10):
+
+    '''
+    This function runs, for every group, the Mann-Whitney U tests between the pairs of classes given in comparisons, e.g. [('b.DET+','d.DET-')].
+    It returns a results table as a dictionary of vectors: group, first, second, nFirst, nSecond, statistic and pvalue,
+    with NaN statistics for tests where a sample is smaller than minimumSize.
+    '''
+
+    values=numpy.asarray(values,dtype=numpy.float64); groupCodes=numpy.asarray(groupCodes,dtype=numpy.int64); classes=numpy.asarray(classes)
+    numberOfGroups=int(groupCodes.max())+1 if len(groupCodes) != 0 else 0
+
+    # f.1. observations of every comparison, coded as test=group*len(comparisons)+comparison
+    batchValues=[]; batchTests=[]; batchFirst=[]
+    for k in range(len(comparisons)):
+        a,b=comparisons[k]
+        selected=(classes == a) | (classes == b)
+        batchValues.append(values[selected])
+        batchTests.append(groupCodes[selected]*len(comparisons)+k)
+        batchFirst.append(classes[selected] == a)
+    batchTests=numpy.concatenate(batchTests)
+
+    # f.2. one batched call for all tests
+    numberOfTests=numberOfGroups*len(comparisons)
+    statistic,pvalue,nFirst,nSecond=mannWhitneyBatch(numpy.concatenate(batchValues),batchTests,numpy.concatenate(batchFirst),numberOfTests=numberOfTests)
+
+    small=(nFirst < minimumSize) | (nSecond < minimumSize)
+    statistic[small]=numpy.nan; pvalue[small]=numpy.nan
+
+    results={}
+    results['group']=numpy.repeat(numpy.arange(numberOfGroups),len(comparisons))
+    results['first']=numpy.array([comparison[0] for comparison in comparisons]*numberOfGroups)
+    results['second']=numpy.array([comparison[1] for comparison in comparisons]*numberOfGroups)
+    results['nFirst']=nFirst
+    results['nSecond']=nSecond
+    results['statistic']=statistic
+    results['pvalue']=pvalue
+
+    return results
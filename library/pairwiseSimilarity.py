@@ -0,0 +1,80 @@
+###
+### This module compares every pair of a stack of profiles P[profile,condition] at once, as used for corem median profiles in a block of conditions.
+### Two-sample Kolmogorov-Smirnov statistics come from the empirical distribution function of each profile evaluated at the values of all profiles,
+### and Spearman correlations from the correlation of row-wise ranks. Both return full matrices of statistics and two-sided p-values,
+### matching scipy.stats.ks_2samp (automatic method) and scipy.stats.spearmanr for profiles of equal length.
+###
+
+import numpy
+import scipy,scipy.stats
+
+def ksMatrix(P,chunkSize=256):
+
+    '''
+    This function computes the two-sample KS statistic and p-value between all pairs of rows of P, as matrices D[a,b] and pvalues[a,b].
+    As all profiles have the same length n, statistics are multiples of 1/n and p-values are looked up from a table of n+1 entries.
+    Profiles are evaluated chunkSize at a time to bound memory.
+    '''
+
+    P=numpy.asarray(P,dtype=numpy.float64)
+    k,n=P.shape
+    S=numpy.sort(P,axis=1)
+
+    # f.1. own distribution function of every profile at its values
+    own=numpy.empty((k,n),dtype=numpy.int64)
+    for a in range(k):
+        own[a]=numpy.searchsorted(S[a],P[a],side='right')
+
+    # f.2. largest count difference of every profile b at the values of every profile a
+    E=numpy.zeros((k,k),dtype=numpy.int64)
+    for start in range(0,k,chunkSize):
+        stop=min(start+chunkSize,k)
+        for b in range(k):
+            counts=numpy.searchsorted(S[b],P[start:stop].ravel(),side='right').reshape(stop-start,n)
+            E[start:stop,b]=numpy.max(numpy.abs(own[start:stop]-counts),axis=1)
+    steps=numpy.maximum(E,E.T)
+
+    # f.3. statistics and p-values
+    D=steps/n
+    table=ksTable(n)
+    pvalues=table[steps]
+
+    return D,pvalues
+
+def ksTable(n):
+
+    '''
+    This function returns the two-sided p-values of ks_2samp for two samples of size n and every possible statistic h/n, h=0..n.
+    Shifting a sequence of n distinct values by h positions yields a statistic of exactly h/n.
+    '''
+
+    reference=numpy.arange(n,dtype=numpy.float64)
+    table=numpy.array([scipy.stats.ks_2samp(reference,reference+h).pvalue for h in range(n+1)])
+
+    return table
+
+def spearmanMatrix(P):
+
+    '''
+    This function computes Spearman correlations and their two-sided p-values between all pairs of rows of P, as matrices rho[a,b] and pvalues[a,b].
+    Ties receive average ranks. Constant profiles have undefined (NaN) correlations.
+    '''
+
+    P=numpy.asarray(P,dtype=numpy.float64)
+    k,n=P.shape
+    R=scipy.stats.rankdata(P,axis=1)
+
+    # f.1. Pearson correlation of ranks
+    centered=R-numpy.mean(R,axis=1,keepdims=True)
+    norms=numpy.sqrt(numpy.sum(centered**2,axis=1))
+    with numpy.errstate(divide='ignore',invalid='ignore'):
+        rho=(centered@centered.T)/numpy.outer(norms,norms)
+    rho=numpy.clip(rho,-1,1)
+
+    # f.2. t-distribution p-values
+    dof=n-2
+    with numpy.errstate(divide='ignore',invalid='ignore'):
+        t=rho*numpy.sqrt((dof/((rho+1.0)*(1.0-rho))).clip(0))
+    pvalues=2*scipy.stats.t.sf(numpy.abs(t),dof)
+
+    return rho,pvalues
@@ -0,0 +1,117 @@
+###
+### This module reads the folder of TMT protein CSV files (<condition>.<replicate>...csv) into a single array
+### values[condition,replicate,contrast,protein] of log2 fold changes, with a protein index.
+### Files are parsed in parallel. The nested dictionary used by the scripts is available through dictionaryAdapter.
+###
+
+import os,numpy
+import multiprocessing
+
+contrasts=['tp2vs1','tp3vs1','tp4vs1']
+contrastColumns=[2,6,10]
+
+def dictionaryAdapter(proteomics,proteins=None):
+
+    '''
+    This function returns the nested dictionary data[condition][replicate][contrast][protein]=log2FC and the sorted protein names found,
+    optionally restricted to a set of proteins. Only values present in a file are included.
+    '''
+
+    if proteins is None:
+        selected=numpy.arange(len(proteomics['proteins']))
+    else:
+        selected=numpy.array([proteomics['proteinIndex'][protein] for protein in proteins if protein in proteomics['proteinIndex']],dtype=numpy.int64)
+
+    data={}
+    found=numpy.zeros(len(proteomics['proteins']),dtype=bool)
+    for i in range(len(proteomics['conditions'])):
+        condition=proteomics['conditions'][i]
+        for j in range(len(proteomics['replicates'])):
+            replicate=proteomics['replicates'][j]
+            if proteomics['files'][i,j] == False:
+                continue
+            data.setdefault(condition,{})[replicate]={}
+            present=selected[proteomics['present'][i,j,selected]]
+            found[present]=True
+            names=[proteomics['proteins'][element] for element in present]
+            for k in range(len(contrasts)):
+                data[condition][replicate][contrasts[k]]=dict(zip(names,proteomics['values'][i,j,k,present].tolist()))
+
+    proteinNames=sorted([proteomics['proteins'][element] for element in numpy.flatnonzero(found)])
+
+    return data,proteinNames
+
+def fileParser(path):
+
+    '''
+    This function parses one protein CSV file into its protein names and a matrix V[protein,contrast]. A repeated protein keeps its last line.
+    '''
+
+    rows={}
+    with open(path,'r') as f:
+        next(f)
+        for line in f:
+            vector=line.split(',')
+            rows[vector[0]]=[float(vector[column]) for column in contrastColumns]
+
+    names=list(rows.keys())
+    V=numpy.array(list(rows.values()),dtype=numpy.float64).reshape(len(names),len(contrastColumns))
+
+    return names,V
+
+def proteomicsLoader(dataFolder,tag=None,numberOfThreads=4):
+
+    '''
+    This function reads all protein CSV files of a folder, optionally only those whose name contains tag, and returns a dictionary with
+    values[condition,replicate,contrast,protein] (NaN where absent), present[condition,replicate,protein], files[condition,replicate],
+    the sorted conditions, replicates and proteins, the contrasts and proteinIndex[protein]=position.
+    '''
+
+    allFiles=os.listdir(dataFolder)
+    csvFiles=[element for element in allFiles if '.csv' in element and '._' not in element]
+    if tag is not None:
+        csvFiles=[element for element in csvFiles if tag in element]
+    csvFiles.sort()
+    paths=[os.path.join(dataFolder,csvFile) for csvFile in csvFiles]
+
+    # f.1. parse files in parallel
+    if len(paths) > 1 and numberOfThreads > 1:
+        # workers are forked, so that they do not re-run the calling script as they would with the spawn start method
+        hydra=multiprocessing.get_context('fork').Pool(min(numberOfThreads,len(paths)))
+        try:
+            parsed=hydra.map(fileParser,paths)
+        finally:
+            hydra.close()
+            hydra.join()
+    else:
+        parsed=[fileParser(path) for path in paths]
+
+    # f.2. define axes
+    labels=[(csvFile.split('.')[0],csvFile.split('.')[1]) for csvFile in csvFiles]
+    conditions=sorted(set([label[0] for label in labels]))
+    replicates=sorted(set([label[1] for label in labels]))
+    proteins=sorted(set().union(*[names for names,V in parsed]))
+    proteinIndex={proteins[i]:i for i in range(len(proteins))}
+
+    # f.3. fill the array
+    values=numpy.full((len(conditions),len(replicates),len(contrasts),len(proteins)),numpy.nan)
+    present=numpy.zeros((len(conditions),len(replicates),len(proteins)),dtype=bool)
+    files=numpy.zeros((len(conditions),len(replicates)),dtype=bool)
+    for (condition,replicate),(names,V) in zip(labels,parsed):
+        i=conditions.index(condition); j=replicates.index(replicate)
+        columns=numpy.array([proteinIndex[name] for name in names],dtype=numpy.int64)
+        values[i,j,:,columns]=V
+        present[i,j,columns]=True
+        files[i,j]=True
+
+    proteomics={}
+    proteomics['values']=values
+    proteomics['present']=present
+    proteomics['files']=files
+    proteomics['conditions']=conditions
+    proteomics['replicates']=replicates
+    proteomics['contrasts']=contrasts
+    proteomics['proteins']=proteins
+    proteomics['proteinIndex']=proteinIndex
+
+    return proteomics
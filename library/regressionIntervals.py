@@ -0,0 +1,135 @@
+###
+### This module fits simple ordinary least squares (OLS) models y=a+bx in closed form, for one or many groups of points in a single vectorized pass.
+### For every group it returns slope, intercept, r, p-value and standard error as scipy.stats.linregress does,
+### and evaluates confidence (CI) and prediction intervals (PI) exactly at any set of x values, as statsmodels wls_prediction_std does with unit weights.
+###
+
+import numpy
+import scipy,scipy.stats
+
+def intervalComputer(fits,x,alpha=0.05):
+
+    '''
+    This function evaluates fitted models at x and returns predicted, CI=[upper,lower] and PI=[upper,lower].
+    For batched fits x is a matrix [group,point], or a vector shared by all groups.
+    '''
+
+    x=numpy.asarray(x,dtype=numpy.float64)
+    fits={key:numpy.asarray(value) for key,value in fits.items()}
+    if fits['slope'].ndim == 1:
+        fits={key:value[:,None] for key,value in fits.items()}
+
+    predicted=fits['intercept']+fits['slope']*x
+    t=scipy.stats.t.ppf(1-alpha/2,df=fits['dof'])
+    leverage=1/fits['n']+(x-fits['meanX'])**2/fits['Sxx']
+    confidence=t*numpy.sqrt(fits['s2']*leverage)
+    prediction=t*numpy.sqrt(fits['s2']*(1+leverage))
+
+    CI=[predicted+confidence,predicted-confidence]
+    PI=[predicted+prediction,predicted-prediction]
+
+    return predicted,CI,PI
+
+def olsFitter(x,y):
+
+    '''
+    This function fits y=intercept+slope*x for a single group of points and returns a dictionary of scalars, see regressionFitter.
+    '''
+
+    fits=regressionFitter([x],[y])
+    fit={key:value[0] for key,value in fits.items()}
+
+    return fit
+
+def outlierClassifier(fit,x,y,alpha=0.05):
+
+    '''
+    This function classifies every point against the prediction interval of a fitted OLS model of y on x, evaluated exactly at its own x.
+    The fit is the one given, for instance the one drawn by regressionAnalysis, and is not recomputed.
+    It returns labels (1 above the interval, -1 below, 0 within) together with the upper and lower limits at each point.
+    '''
+
+    x=numpy.asarray(x,dtype=numpy.float64); y=numpy.asarray(y,dtype=numpy.float64)
+    upper,lower=predictionLimits(fit,x,alpha=alpha)
+
+    labels=numpy.zeros(len(x),dtype=numpy.int8)
+    labels[y > upper]=1
+    labels[y < lower]=-1
+
+    return labels,upper,lower
+
+def predictionLimits(fit,x,alpha=0.05):
+
+    '''
+    This function returns the upper and lower limits of the 1-alpha prediction interval of a fitted model at the values x.
+    '''
+
+    predicted,CI,PI=intervalComputer(fit,x,alpha=alpha)
+
+    return PI[0],PI[1]
+
+def regressionAnalysis(x,y,fit=None,points=100,alpha=0.05):
+
+    '''
+    This function returns the regression of y on x as the regression line and its CI and PI bands over an even grid of the range of x, as
+    regressionLine=[x grid,predicted], CI=[upper,lower], PI=[upper,lower]
+    A fit already computed, for instance by a batched call to regressionFitter, may be given.
+    '''
+
+    x=numpy.asarray(x,dtype=numpy.float64)
+    if fit is None:
+        fit=olsFitter(x,y)
+
+    # bands over the range of x
+    grid=numpy.linspace(x.min(),x.max(),points)
+    predicted,CI,PI=intervalComputer(fit,grid,alpha=alpha)
+    regressionLine=[grid,predicted]
+
+    return regressionLine,CI,PI
+
+def regressionFitter(xs,ys):
+
+    '''
+    This function fits y=intercept+slope*x independently for each group i of points xs[i],ys[i], all groups at once.
+    It returns a dictionary of vectors over groups: slope, intercept, r, p (two-sided test of zero slope), stderr (of the slope),
+    n, meanX, Sxx (sum of squared deviations of x), s2 (residual variance) and dof (residual degrees of freedom).
+    '''
+
+    sizes=numpy.array([len(element) for element in xs],dtype=numpy.int64)
+    groups=numpy.repeat(numpy.arange(len(sizes)),sizes)
+    x=numpy.concatenate([numpy.asarray(element,dtype=numpy.float64) for element in xs])
+    y=numpy.concatenate([numpy.asarray(element,dtype=numpy.float64) for element in ys])
+
+    # f.1. centered sums per group
+    meanX=numpy.bincount(groups,x,len(sizes))/sizes
+    meanY=numpy.bincount(groups,y,len(sizes))/sizes
+    dx=x-meanX[groups]; dy=y-meanY[groups]
+    Sxx=numpy.bincount(groups,dx*dx,len(sizes))
+    Sxy=numpy.bincount(groups,dx*dy,len(sizes))
+    Syy=numpy.bincount(groups,dy*dy,len(sizes))
+
+    # f.2. model and statistics
+    slope=Sxy/Sxx
+    intercept=meanY-slope*meanX
+    residuals=dy-slope[groups]*dx
+    dof=sizes-2
+    s2=numpy.bincount(groups,residuals*residuals,len(sizes))/dof
+    r=numpy.clip(Sxy/numpy.sqrt(Sxx*Syy),-1,1)
+    stderr=numpy.sqrt(s2/Sxx)
+    with numpy.errstate(divide='ignore'):
+        t=r*numpy.sqrt(dof/((1-r)*(1+r)))
+    p=2*scipy.stats.t.sf(numpy.abs(t),dof)
+
+    fits={}
+    fits['slope']=slope
+    fits['intercept']=intercept
+    fits['r']=r
+    fits['p']=p
+    fits['stderr']=stderr
+    fits['n']=sizes
+    fits['meanX']=meanX
+    fits['Sxx']=Sxx
+    fits['s2']=s2
+    fits['dof']=dof
+
+    return fits
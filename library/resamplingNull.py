@@ -0,0 +1,81 @@
+###
+### This module builds Monte-Carlo null distributions of the mean of groups of values drawn with replacement from a population.
+### Draws are generated in chunks as matrices and averaged row-wise. Chunks of all groups are distributed over a process pool,
+### each with its own random stream spawned from a single seed, so that results do not depend on the number of processes.
+###
+
+import numpy
+import multiprocessing
+
+def chunkMeans(task):
+
+    '''
+    This function returns the means of one chunk of samples. The task is (population,sampleSize,numberOfSamples,seedSequence).
+    '''
+
+    population,sampleSize,numberOfSamples,seedSequence=task
+    generator=numpy.random.default_rng(seedSequence)
+    positions=generator.integers(0,len(population),size=(numberOfSamples,sampleSize))
+    means=numpy.mean(population[positions],axis=1)
+
+    return means
+
+def groupNulls(population,groups,resamples=int(1e6),seed=0,numberOfThreads=4,chunkSize=10000):
+
+    '''
+    This function builds, for every group of values in groups[label], the null distribution of the mean of as many values drawn from the population.
+    It returns results[label] with null (the resampled means), observed (the mean of the group) and pvalue, the fraction of null means beyond
+    the observed one on the side of the nearest tail.
+    '''
+
+    population=numpy.asarray(population,dtype=numpy.float64)
+    labels=list(groups.keys())
+
+    # f.1. chunks of all groups
+    tasks=[]; owners=[]
+    for i in range(len(labels)):
+        sizes=[chunkSize]*(resamples//chunkSize)
+        if resamples%chunkSize != 0:
+            sizes.append(resamples%chunkSize)
+        seedSequences=numpy.random.SeedSequence([seed,i]).spawn(len(sizes))
+        for j in range(len(sizes)):
+            tasks.append((population,len(groups[labels[i]]),sizes[j],seedSequences[j]))
+            owners.append(labels[i])
+
+    # f.2. compute chunks
+    if numberOfThreads > 1 and len(tasks) > 1:
+        # workers are forked, so that they do not re-run the calling script as they would with the spawn start method
+        hydra=multiprocessing.get_context('fork').Pool(min(numberOfThreads,len(tasks)))
+        try:
+            chunks=hydra.map(chunkMeans,tasks)
+        finally:
+            hydra.close()
+            hydra.join()
+    else:
+        chunks=[chunkMeans(task) for task in tasks]
+
+    # f.3. gather nulls and tests
+    results={}
+    for label in labels:
+        null=numpy.concatenate([chunks[k] for k in range(len(chunks)) if owners[k] == label])
+        observed=numpy.mean(groups[label])
+        results[label]={}
+        results[label]['null']=null
+        results[label]['observed']=observed
+        results[label]['pvalue']=tailProbability(null,observed)
+
+    return results
+
+def tailProbability(null,observed):
+
+    '''
+    This function returns the fraction of the null above the observed value, or below it if the observed value is in the lower half.
+    '''
+
+    higherRandoms=numpy.sum(null > observed)
+    if higherRandoms > len(null)/2:
+        pvalue=1-(higherRandoms/float(len(null)))
+    else:
+        pvalue=higherRandoms/float(len(null))
+
+    return pvalue
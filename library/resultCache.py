@@ -0,0 +1,107 @@
+###
+### This module caches computed results under a digest of their inputs, so that identical inputs are never computed twice.
+### The digest is a SHA-256 of the contents of the inputs (arrays, strings, numbers and nested lists and dictionaries), not of file names or dates,
+### so a cache directory can be shared between machines. Each result is a bundle of arrays stored as a directory of .npy files,
+### which are memory-mapped when read back.
+###
+
+import os,sys,hashlib,shutil,numpy
+
+def bundleReader(bundleDir):
+
+    '''
+    This function returns the arrays of a bundle directory as a dictionary of read-only memory-mapped arrays.
+    '''
+
+    bundle={}
+    for element in sorted(os.listdir(bundleDir)):
+        if element.endswith('.npy') == True:
+            bundle[element[:-len('.npy')]]=numpy.load(os.path.join(bundleDir,element),mmap_mode='r',allow_pickle=False)
+
+    return bundle
+
+def bundleWriter(bundle,bundleDir):
+
+    '''
+    This function writes a dictionary of arrays as a bundle directory. Arrays must not be of object type.
+    The bundle is written under a temporary name and moved into place, so that readers never see a partial bundle.
+    '''
+
+    temporaryDir=bundleDir.rstrip(os.sep)+'.{}.tmp'.format(os.getpid())
+    if os.path.exists(temporaryDir) == True:
+        shutil.rmtree(temporaryDir)
+    os.makedirs(temporaryDir)
+    for key in bundle:
+        numpy.save(os.path.join(temporaryDir,key+'.npy'),numpy.asarray(bundle[key]),allow_pickle=False)
+
+    try:
+        os.rename(temporaryDir,bundleDir)
+    except OSError: # another process stored the same result first
+        shutil.rmtree(temporaryDir)
+
+    return None
+
+def cachedComputer(cacheDir,inputs,computer,*arguments):
+
+    '''
+    This function returns the bundle of arrays of computer(*arguments), stored in cacheDir under the digest of inputs.
+    inputs must hold everything the result depends on. On a hit the stored bundle is memory-mapped, on a miss it is computed and stored first.
+    '''
+
+    digest=inputDigest(inputs)
+    bundleDir=os.path.join(cacheDir,digest)
+
+    if os.path.isdir(bundleDir) == True:
+        print('\t recovering cached results {}...'.format(digest[:12]))
+        return bundleReader(bundleDir)
+
+    bundle=computer(*arguments)
+    try:
+        os.makedirs(cacheDir,exist_ok=True)
+        bundleWriter(bundle,bundleDir)
+    except OSError as error:
+        print('\t could not write cache in {} ({}), continuing without it.'.format(cacheDir,error))
+        return bundle
+
+    return bundleReader(bundleDir)
+
+def digestUpdater(hasher,element):
+
+    '''
+    This function feeds an input into the hasher, tagged by type so that for instance 1, 1.0 and '1' differ.
+    Dictionaries are fed in the order of their sorted keys.
+    '''
+
+    if isinstance(element,numpy.ndarray) == True or isinstance(element,numpy.generic) == True:
+        element=numpy.ascontiguousarray(element)
+        hasher.update('array:{}:{}:'.format(element.dtype.str,element.shape).encode())
+        hasher.update(element.tobytes())
+    elif isinstance(element,dict) == True:
+        keys=sorted(element.keys(),key=repr)
+        hasher.update('dict:{}:'.format(len(keys)).encode())
+        for key in keys:
+            digestUpdater(hasher,key)
+            digestUpdater(hasher,element[key])
+    elif isinstance(element,(list,tuple)) == True:
+        hasher.update('list:{}:'.format(len(element)).encode())
+        for item in element:
+            digestUpdater(hasher,item)
+    elif isinstance(element,(str,int,float,bool)) == True or element is None:
+        hasher.update('{}:{}:'.format(type(element).__name__,repr(element)).encode())
+    else:
+        print('cannot digest inputs of type {}. Exiting...'.format(type(element).__name__))
+        sys.exit()
+
+    return None
+
+def inputDigest(inputs):
+
+    '''
+    This function returns the hexadecimal SHA-256 digest of the contents of inputs.
+    '''
+
+    hasher=hashlib.sha256()
+    digestUpdater(hasher,inputs)
+    digest=hasher.hexdigest()
+
+    return digest
@@ -0,0 +1,116 @@
+###
+### This module estimates the uncertainty of the slope and intercept of TE versus expression fits by resampling.
+### Three modes are available: resampling genes with replacement, resampling replicates within genes (recomputing medians),
+### and permuting y to build the null distribution of the slope. Resamples are computed in chunks across a process pool,
+### each chunk with its own random stream spawned from a single seed, so that results are reproducible for any number of processes.
+###
+
+import sys,numpy
+import multiprocessing
+
+def chunkResampler(task):
+
+    '''
+    This function computes the slopes and intercepts of one chunk of resamples. The task is (mode,arrays,size,seedSequence).
+    '''
+
+    mode,arrays,size,seedSequence=task
+    generator=numpy.random.default_rng(seedSequence)
+
+    if mode == 'genes':
+        x,y=arrays
+        positions=generator.integers(0,len(x),size=(size,len(x)))
+        X=x[positions]; Y=y[positions]
+    elif mode == 'permutation':
+        x,y=arrays
+        X=numpy.broadcast_to(x,(size,len(x)))
+        Y=generator.permuted(numpy.broadcast_to(y,(size,len(y))),axis=1)
+    elif mode == 'replicates':
+        M,F=arrays
+        genes,replicates=M.shape
+        positions=generator.integers(0,replicates,size=(size,genes,replicates))
+        rows=numpy.arange(genes)[None,:,None]
+        log2M=numpy.log2(M[rows,positions]+1)
+        X=numpy.median(numpy.log10(M[rows,positions]+1),axis=2)
+        Y=numpy.median(numpy.log2(F[rows,positions]+1),axis=2)-numpy.median(log2M,axis=2)
+    else:
+        print('error when selecting resampling mode {}'.format(mode))
+        sys.exit()
+
+    slopes,intercepts=rowFitter(X,Y)
+
+    return slopes,intercepts
+
+def replicateBootstrap(M,F,resamples=10000,seed=0,numberOfThreads=4,alpha=0.05,chunkSize=100):
+
+    '''
+    This function resamples replicates within genes for mRNA and footprint matrices M[gene,replicate] and F[gene,replicate] in TPMs.
+    For each resample the median log10 mRNA and the log2 TE ratio are recomputed and refitted. See resamplingRunner for the results.
+    '''
+
+    results=resamplingRunner('replicates',(numpy.asarray(M,dtype=numpy.float64),numpy.asarray(F,dtype=numpy.float64)),resamples,seed,numberOfThreads,alpha,chunkSize)
+
+    return results
+
+def resamplingRunner(mode,arrays,resamples,seed,numberOfThreads,alpha,chunkSize):
+
+    '''
+    This function distributes the resamples in chunks over a process pool and returns a dictionary with
+    slopes and intercepts of all resamples, and slopeCI and interceptCI as the percentile intervals at level 1-alpha.
+    '''
+
+    sizes=[chunkSize]*(resamples//chunkSize)
+    if resamples%chunkSize != 0:
+        sizes.append(resamples%chunkSize)
+    seedSequences=numpy.random.SeedSequence(seed).spawn(len(sizes))
+    tasks=[(mode,arrays,sizes[i],seedSequences[i]) for i in range(len(sizes))]
+
+    if numberOfThreads > 1 and len(tasks) > 1:
+        # workers are forked, so that they do not re-run the calling script as they would with the spawn start method
+        hydra=multiprocessing.get_context('fork').Pool(min(numberOfThreads,len(tasks)))
+        try:
+            chunks=hydra.map(chunkResampler,tasks)
+        finally:
+            hydra.close()
+            hydra.join()
+    else:
+        chunks=[chunkResampler(task) for task in tasks]
+
+    results={}
+    results['slopes']=numpy.concatenate([chunk[0] for chunk in chunks])
+    results['intercepts']=numpy.concatenate([chunk[1] for chunk in chunks])
+    results['slopeCI']=numpy.quantile(results['slopes'],[alpha/2,1-alpha/2])
+    results['interceptCI']=numpy.quantile(results['intercepts'],[alpha/2,1-alpha/2])
+
+    return results
+
+def rowFitter(X,Y):
+
+    '''
+    This function fits y=intercept+slope*x independently on each row of matrices X and Y.
+    '''
+
+    meanX=numpy.mean(X,axis=1); meanY=numpy.mean(Y,axis=1)
+    dx=X-meanX[:,None]
+    slopes=numpy.sum(dx*(Y-meanY[:,None]),axis=1)/numpy.sum(dx*dx,axis=1)
+    intercepts=meanY-slopes*meanX
+
+    return slopes,intercepts
+
+def slopeBootstrap(x,y,resamples=10000,mode='genes',seed=0,numberOfThreads=4,alpha=0.05,chunkSize=100):
+
+    '''
+    This function resamples the points of a fit of y on x, either genes with replacement (mode='genes') or y permuted against x (mode='permutation').
+    For permutations, results also holds pvalue, the two-sided fraction of null slopes at least as extreme as the observed one.
+    See resamplingRunner for the other results.
+    '''
+
+    x=numpy.asarray(x,dtype=numpy.float64); y=numpy.asarray(y,dtype=numpy.float64)
+    results=resamplingRunner(mode,(x,y),resamples,seed,numberOfThreads,alpha,chunkSize)
+
+    if mode == 'permutation':
+        observed=rowFitter(x[None,:],y[None,:])[0][0]
+        extreme=numpy.sum(numpy.abs(results['slopes']) >= abs(observed))
+        results['pvalue']=(extreme+1)/(resamples+1)
+
+    return results
@@ -0,0 +1,164 @@
+###
+### This module computes translational efficiency (TE) for all genes and timepoints at once.
+### Expression is arranged as tensors T[fraction][gene,timepoint,replicate] of TPMs, from which log-transformed mRNA and footprint levels,
+### relative standard errors of the mean (RSEM), medians, TE ratios and the with/without footprint partition are obtained as whole-array operations.
+### Per-gene results are exchanged as a columnar table, one row per gene and time point, stored as .npz with an optional TSV copy.
+###
+
+import os,numpy
+import expressionCache
+
+textColumns=['gene','timepoint','footprint','DET','deviation']
+
+def efficiencyComputer(M,F,expressionThreshold=10,noiseThreshold=0.3):
+
+    '''
+    This function computes TE from mRNA and footprint tensors M[gene,timepoint,replicate] and F[gene,timepoint,replicate] in TPMs.
+    It returns a dictionary of matrices [gene,timepoint]:
+    m, the median of log10 mRNA TPM+1
+    r, the TE ratio as the difference of medians of log2 footprint TPM+1 and log2 mRNA TPM+1
+    rsemM and rsemF, the RSEM of log2 values, set to zero for genes not above expressionThreshold TPMs in any replicate
+    withFootprint and withoutFootprint, boolean masks of genes passing the noise filter with and without footprints.
+    '''
+
+    log2M=numpy.log2(M+1)
+    log10M=numpy.log10(M+1)
+    log2F=numpy.log2(F+1)
+
+    # noise
+    rsemM=rsemComputer(log2M,expressionThreshold)
+    rsemF=rsemComputer(log2F,expressionThreshold)
+
+    # medians and ratio
+    m=numpy.median(log10M,axis=2)
+    r=numpy.median(log2F,axis=2)-numpy.median(log2M,axis=2)
+
+    # differentiate between transcripts with or without footprints
+    hollow=(numpy.median(F,axis=2) == 0) | (numpy.median(M,axis=2) < 1)
+    withoutFootprint=hollow & (rsemM < noiseThreshold)
+    withFootprint=(~hollow) & (rsemM < noiseThreshold) & (rsemF < noiseThreshold)
+
+    TE={}
+    TE['m']=m
+    TE['r']=r
+    TE['rsemM']=rsemM
+    TE['rsemF']=rsemF
+    TE['withFootprint']=withFootprint
+    TE['withoutFootprint']=withoutFootprint
+
+    return TE
+
+def resultsReader(resultsFile):
+
+    '''
+    This function reads a table of per-gene results written by resultsWriter, from resultsFile.npz or, if absent, from resultsFile.tsv.
+    '''
+
+    if os.path.exists(resultsFile+'.npz') == True:
+        with numpy.load(resultsFile+'.npz',allow_pickle=False) as stored:
+            table={key:stored[key] for key in stored.files}
+        return table
+
+    with open(resultsFile+'.tsv','r') as f:
+        header=f.readline().rstrip('\n').split('\t')
+        rows=[line.rstrip('\n').split('\t') for line in f]
+    columns=list(zip(*rows)) if len(rows) != 0 else [[] for element in header]
+
+    table={}
+    for i in range(len(header)):
+        if header[i] in textColumns:
+            table[header[i]]=numpy.array(columns[i],dtype=numpy.str_)
+        else:
+            table[header[i]]=numpy.array(columns[i],dtype=numpy.float64)
+
+    return table
+
+def resultsSelector(table,timepoint,genes,column):
+
+    '''
+    This function returns the values of a column of the results table for a list of genes at one time point, NaN (or empty) for genes not in the table.
+    '''
+
+    selected=numpy.flatnonzero(table['timepoint'] == timepoint)
+    rowOf=dict(zip(table['gene'][selected].tolist(),selected.tolist()))
+    rows=numpy.array([rowOf.get(gene,-1) for gene in genes],dtype=numpy.int64)
+    found=rows >= 0
+
+    if column in textColumns:
+        values=numpy.full(len(rows),'',dtype=table[column].dtype)
+    else:
+        values=numpy.full(len(rows),numpy.nan)
+    values[found]=table[column][rows[found]]
+
+    return values
+
+def resultsWriter(table,resultsFile,tsv=True):
+
+    '''
+    This function stores a table of per-gene results, a dictionary of equally long columns, as resultsFile.npz and, if tsv is True, as resultsFile.tsv.
+    Files are written under temporary names and moved into place.
+    '''
+
+    temporaryFile=resultsFile+'.{}.tmp.npz'.format(os.getpid())
+    numpy.savez_compressed(temporaryFile,**table)
+    os.replace(temporaryFile,resultsFile+'.npz')
+
+    if tsv == True:
+        keys=list(table.keys())
+        columns=[table[key].tolist() for key in keys]
+        temporaryFile=resultsFile+'.{}.tmp'.format(os.getpid())
+        with open(temporaryFile,'w') as f:
+            f.write('\t'.join(keys)+'\n')
+            for row in zip(*columns):
+                f.write('\t'.join([str(element) for element in row])+'\n')
+        os.replace(temporaryFile,resultsFile+'.tsv')
+
+    return None
+
+def rsemComputer(X,expressionThreshold):
+
+    '''
+    This function computes the RSEM over the last axis of log2 values X, zero where the maximum is not above log2 of expressionThreshold+1.
+    '''
+
+    n=X.shape[-1]
+    sem=numpy.std(X,axis=-1)/numpy.sqrt(n)
+    mean=numpy.mean(X,axis=-1)
+    expressed=numpy.max(X,axis=-1) > numpy.log2(expressionThreshold+1)
+
+    rsem=numpy.zeros(mean.shape)
+    rsem[expressed]=sem[expressed]/mean[expressed]
+
+    return rsem
+
+def tensorReader(matrixFile):
+
+    '''
+    This function reads the expression matrix into tensors T[trna/rbf][gene,timepoint,replicate], together with
+    geneNames, timepoints and replicates in the same order as expressionCache.transcriptomicsReader.
+    Underscores are removed from gene names and a repeated gene keeps its last row.
+    '''
+
+    E,rawGeneNames,labels=expressionCache.cachedMatrixReader(matrixFile)
+
+    names=[element.replace('_','') for element in rawGeneNames]
+    lastRow={names[i]:i for i in range(len(names))}
+    geneNames=list(dict.fromkeys(names))
+    rows=numpy.array([lastRow[geneName] for geneName in geneNames],dtype=numpy.int64)
+
+    fractions=[]; timepoints=[]; replicates=[]; positions=[]
+    for label in labels:
+        fraction,replicate,timepoint=expressionCache.labelParser(label)
+        for element,collection in [(fraction,fractions),(timepoint,timepoints),(replicate,replicates)]:
+            if element not in collection:
+                collection.append(element)
+        positions.append((fraction,timepoints.index(timepoint),replicates.index(replicate)))
+
+    T={}
+    for fraction in fractions:
+        T[fraction]=numpy.full((len(geneNames),len(timepoints),len(replicates)),numpy.nan)
+    for i in range(len(labels)):
+        fraction,j,k=positions[i]
+        T[fraction][:,j,k]=E[rows,i]
+
+    return T,geneNames,timepoints,replicates